@@ -0,0 +1,120 @@
+"""
+CPU and memory spent on incoming guild messages under the default and lean gateway profiles.
+
+Feeds synthetic MESSAGE_CREATE payloads for an unpinned channel straight into each bot's gateway parser,
+lets the dispatched events run, and reports the time per message and the memory still held afterwards.
+Only message handling is measured. No GUILD_CREATE member lists or GUILD_MEMBERS_CHUNK payloads are replayed, so the
+member cache and chunking settings of the lean profile don't show up in these numbers.
+
+    uv run python -m benchmarks.bench_gateway_profile
+"""
+
+import asyncio
+import gc
+import logging
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import discord
+
+from pinformation_bot.bot_config import BotConfig
+from pinformation_bot.pinformation import PinformationBot, create_bot
+
+GUILD_ID = 1 << 22
+CHANNEL_ID = GUILD_ID + 1
+BOT_ID = GUILD_ID + 2
+MESSAGES = 20_000
+BATCH = 500
+NOT_MEASURED = (
+    "Not measured: member cache and guild chunking. Without the privileged members intent neither profile chunks\n"
+    + "guilds, and the default profile only caches members in voice, so the lean profile saves little there."
+)
+
+
+def make_bot(profile: str, database_file: Path) -> PinformationBot:
+    config = BotConfig(prefix="+", log_channel="0", embed_color=0, gateway_profile=profile)  # pyright: ignore[reportArgumentType]
+    bot = create_bot(config, database_file)
+    state = bot._connection  # pyright: ignore[reportPrivateUsage]
+    state.user = discord.ClientUser(
+        state=state, data={"id": BOT_ID, "username": "pinformation", "discriminator": "0", "avatar": None}
+    )
+    _ = state._add_guild_from_data(  # pyright: ignore[reportPrivateUsage]
+        {
+            "id": GUILD_ID,
+            "name": "bench",
+            "member_count": 1,
+            "channels": [{"id": CHANNEL_ID, "type": 0, "name": "general", "position": 0}],
+            "roles": [],
+        }  # pyright: ignore[reportArgumentType]
+    )
+    return bot
+
+
+def message_payload(message_id: int) -> dict[str, Any]:
+    author_id = 1000 + message_id % 50
+    return {
+        "id": str((message_id + 1) << 22),
+        "channel_id": str(CHANNEL_ID),
+        "guild_id": str(GUILD_ID),
+        "author": {"id": str(author_id), "username": f"user{author_id}", "discriminator": "0", "avatar": None},
+        "member": {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False},
+        "content": f"just chatting, message number {message_id}",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+async def feed(bot: PinformationBot, payloads: list[dict[str, Any]]) -> float:
+    parse = bot._connection.parsers["MESSAGE_CREATE"]  # pyright: ignore[reportPrivateUsage]
+    current = asyncio.current_task()
+    started = perf_counter()
+    for start in range(0, len(payloads), BATCH):
+        for data in payloads[start : start + BATCH]:
+            parse(data)
+        _ = await asyncio.gather(*(task for task in asyncio.all_tasks() if task is not current))
+    return perf_counter() - started
+
+
+async def run(profile: str) -> tuple[float, int]:
+    """Time one bot with tracing off, then measure the memory a second bot holds after the same traffic."""
+    payloads = [message_payload(message_id) for message_id in range(MESSAGES)]
+    results: list[float] = []
+    for traced in (False, True):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bot = make_bot(profile, Path(tmp_dir) / "bench.db")
+            await bot._async_setup_hook()  # pyright: ignore[reportPrivateUsage]  # binds the bot to this loop, as login() does
+            gc.collect()
+            if traced:
+                tracemalloc.start()
+            elapsed = await feed(bot, payloads)
+            gc.collect()
+            results.append(tracemalloc.get_traced_memory()[0] if traced else elapsed)
+            tracemalloc.stop()
+            bot.database.close()
+    return results[0], int(results[1])
+
+
+def main() -> None:
+    logging.disable(logging.INFO)  # keep per-event debug logging out of the measurement
+    for profile in ("default", "lean"):
+        elapsed, held = asyncio.run(run(profile))
+        print(
+            f"{profile:>7}: {elapsed / MESSAGES * 1_000_000:.1f} us/message, "
+            + f"{held / 1024 / 1024:.2f} MiB held after {MESSAGES} messages"
+        )
+    print(NOT_MEASURED)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark of the CPU spent preparing one pin repost request.
+
+Compares what `channel.send(embed=...)` does on every call (building the message parameters from the
+embed, then JSON encoding them) with the pin's cached payload, which only needs JSON encoding.
+
+    uv run python -m benchmarks.bench_payload
+"""
+
+import secrets
+from timeit import repeat
+
+import discord
+from discord.http import handle_message_parameters
+from discord.utils import _to_json  # pyright: ignore[reportPrivateUsage]
+
+from pinformation_bot.pins import EmbedPin, PinUnion, TextPin
+
+ALLOWED_MENTIONS = discord.AllowedMentions(everyone=False)
+NUMBER = 20_000
+
+
+def discord_py_send(pin: PinUnion) -> str:
+    kwargs = {"embed": pin.embed} if isinstance(pin, EmbedPin) else {"content": pin.text}
+    with handle_message_parameters(
+        **kwargs, nonce=secrets.randbits(64), previous_allowed_mentions=ALLOWED_MENTIONS
+    ) as params:
+        return _to_json(params.payload)
+
+
+def cached_send(pin: PinUnion) -> str:
+    return _to_json(pin.message_payload(ALLOWED_MENTIONS))
+
+
+def per_call_us(func: object, pin: PinUnion) -> float:
+    best = min(repeat(lambda: func(pin), number=NUMBER, repeat=5))  # pyright: ignore[reportCallIssue]
+    return best / NUMBER * 1_000_000
+
+
+def main() -> None:
+    pins: dict[str, PinUnion] = {
+        "text": TextPin(channel_id=1, text="Please keep this channel on topic! " * 10),
+        "embed": EmbedPin(
+            channel_id=2,
+            title="Channel rules",
+            text="1. Be nice\n2. No spoilers\n3. Stay on topic\n" * 10,
+            url="https://example.com/rules",
+            image="https://example.com/banner.png",
+            color=14517504,
+        ),
+    }
+    print(f"{'pin':<8}{'discord.py (us)':>18}{'cached (us)':>14}{'speedup':>10}")
+    for name, pin in pins.items():
+        before = per_call_us(discord_py_send, pin)
+        after = per_call_us(cached_send, pin)
+        print(f"{name:<8}{before:>18.2f}{after:>14.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
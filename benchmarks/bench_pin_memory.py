@@ -0,0 +1,72 @@
+"""
+Memory held by 10k tracked pins, and the cost of the per-message counter update on the hot path.
+
+    uv run python -m benchmarks.bench_pin_memory
+"""
+
+import gc
+import tracemalloc
+from datetime import UTC, datetime
+from timeit import repeat
+
+from pinformation_bot.pins import EmbedPin, PinUnion, TextPin
+
+PIN_COUNT = 10_000
+NUMBER = 200_000
+
+
+def make_pins(count: int) -> list[PinUnion]:
+    pins: list[PinUnion] = []
+    for channel_id in range(count):
+        if channel_id % 2:
+            pin: PinUnion = TextPin(channel_id=channel_id, text="Please keep this channel on topic!")
+        else:
+            pin = EmbedPin(channel_id=channel_id, title="Rules", text="Be nice.", color=14517504)
+        pin.last_message = channel_id << 22
+        pin.last_message_dt = datetime.now(UTC)
+        pins.append(pin)
+    return pins
+
+
+def measure_memory() -> tuple[int, list[PinUnion]]:
+    gc.collect()
+    tracemalloc.start()
+    pins = make_pins(PIN_COUNT)
+    gc.collect()
+    used, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used, pins
+
+
+def hot_path_ns(pin: PinUnion) -> float:
+    def count_message() -> None:
+        pin.increment_msg_count()
+        if pin.msg_count >= 1_000_000:
+            pin.msg_count = 0
+
+    best = min(repeat(count_message, number=NUMBER, repeat=5))
+    return best / NUMBER * 1_000_000_000
+
+
+def state_path_ns(pin: PinUnion) -> float:
+    """The same update made directly on the slotted state record, as PinCog's counter does."""
+    state = pin.state
+
+    def count_message() -> None:
+        state.msg_count += 1
+        if state.msg_count >= 1_000_000:
+            state.msg_count = 0
+
+    best = min(repeat(count_message, number=NUMBER, repeat=5))
+    return best / NUMBER * 1_000_000_000
+
+
+def main() -> None:
+    used, pins = measure_memory()
+    print(f"{PIN_COUNT} pins: {used / 1024 / 1024:.2f} MiB ({used / PIN_COUNT:.0f} bytes/pin)")
+    print(f"counted message update: {hot_path_ns(pins[0]):.0f} ns (embed), {hot_path_ns(pins[1]):.0f} ns (text)")
+    print(f"counted message update on PinState: {state_path_ns(pins[0]):.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
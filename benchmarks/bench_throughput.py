@@ -0,0 +1,193 @@
+"""
+End-to-end throughput of the pin engine, offline.
+
+Runs a PinformationBot with PinCog loaded against the in-process fake gateway and HTTP API from fake_discord,
+streams messages across `--channels` pinned channels at `--rate` messages/s for `--duration` seconds, and reports
+messages/s dispatched and folded into pin counters, reposts/s, event loop lag, DB commits/s and repost latency.
+Pass `--json` to also write the results to a file, and the `--min-*`/`--max-*` options to exit non-zero when a run
+regresses past a threshold, as CI does.
+
+    uv run python -m benchmarks.bench_throughput --channels 200 --rate 5000 --duration 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import sys
+import tempfile
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+from typing import Any
+
+import discord
+
+from pinformation_bot.bot_config import BotConfig
+from pinformation_bot.cogs.pin_cog import PinCog
+from pinformation_bot.pinformation import create_bot
+from pinformation_bot.pins import SpeedTypes, TextPin
+
+from .fake_discord import GUILD_ID, FakeDiscordHTTP, FakeGateway, Snowflakes
+
+TICK = 0.01  # how often the message generator wakes up
+DRAIN_TIMEOUT = 30.0  # how long actors get to work through their mailboxes once generation stops
+LAG_INTERVAL = 0.01  # how often the loop lag sampler wakes up
+
+
+def percentile(samples: list[float], pct: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+async def sample_loop_lag(samples: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(loop.time() - expected, 0.0))
+
+
+async def generate_messages(gateway: FakeGateway, rate: float, duration: float, seed: int) -> None:
+    """Spread `rate` messages/s at random over the gateway's channels, from a handful of users."""
+    rng = random.Random(seed)  # noqa: S311
+    loop = asyncio.get_running_loop()
+    started = last = loop.time()
+    owed = 0.0
+    while (now := loop.time()) - started < duration:
+        owed += (now - last) * rate
+        last = now
+        for _ in range(int(owed)):
+            gateway.message_create(rng.choice(gateway.channel_ids), 1000 + rng.randrange(50), "just chatting")
+        owed -= int(owed)
+        await asyncio.sleep(TICK)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = BotConfig(
+            prefix="+",
+            log_channel="0",
+            embed_color=0,
+            db_write_behind=args.write_behind,
+            min_repost_interval=args.min_repost_interval,
+            gateway_profile=args.profile,
+        )
+        bot = create_bot(config, Path(tmp_dir) / "bench.db")
+        await bot._async_setup_hook()  # pyright: ignore[reportPrivateUsage]  # binds the bot to this loop, as login() does
+        snowflakes = Snowflakes()
+        gateway = FakeGateway(bot, args.channels, snowflakes)
+        gateway.install()
+        http = FakeDiscordHTTP(gateway, latency=args.latency_ms / 1000, jitter=args.latency_ms / 4000, seed=args.seed)
+        http.install()
+
+        cog = PinCog(bot)
+        await bot.add_cog(cog)
+        for index, channel_id in enumerate(gateway.channel_ids):
+            timed = index < args.channels * args.seconds_share
+            pin = TextPin(
+                channel_id=channel_id,
+                guild_id=GUILD_ID,
+                text="Please keep this channel on topic!",
+                speed=args.seconds if timed else args.speed,
+                speed_type=SpeedTypes.seconds if timed else SpeedTypes.messages,
+            )
+            pin.last_message = snowflakes.next()
+            pin.last_message_dt = discord.utils.utcnow()
+            bot.pins.add(pin)
+
+        repost_latencies: list[float] = []
+        update_pin_message = cog._update_pin_message  # pyright: ignore[reportPrivateUsage]
+
+        async def timed_update(channel: discord.abc.Messageable) -> None:
+            started = perf_counter()
+            await update_pin_message(channel)
+            repost_latencies.append(perf_counter() - started)
+
+        cog._update_pin_message = timed_update  # pyright: ignore[reportPrivateUsage]
+
+        lag: list[float] = []
+        sampler = asyncio.create_task(sample_loop_lag(lag))
+        started = perf_counter()
+        await generate_messages(gateway, args.rate, args.duration, args.seed)
+        generated = perf_counter() - started
+        # the clock runs until the pin engine has caught up, so a backlog shows up as a lower counted rate
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(DRAIN_TIMEOUT):
+                while cog.actors.backlog:
+                    await asyncio.sleep(TICK)
+        elapsed = perf_counter() - started
+        _ = sampler.cancel()
+
+        counted, reposts, commits = cog.messages_counted, cog.reposts_sent, bot.database.commit_count
+        _ = await bot.remove_cog(cog.qualified_name)
+        bot.database.close()
+
+    return {
+        "channels": args.channels,
+        "offered_messages_per_s": args.rate,
+        "messages_dispatched_per_s": round(gateway.dispatched / generated, 1),
+        "messages_counted_per_s": round(counted / elapsed, 1),
+        "drain_s": round(elapsed - generated, 2),
+        "reposts_per_s": round(reposts / elapsed, 2),
+        "reposts_skipped": cog.reposts_skipped,
+        "reposts_superseded": bot.governor.dropped,
+        "rate_limited_requests": http.rate_limited,
+        "db_commits_per_s": round(commits / elapsed, 2),
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 50) * 1000, 2),
+            "p99": round(percentile(lag, 99) * 1000, 2),
+            "max": round(max(lag, default=0.0) * 1000, 2),
+        },
+        "repost_latency_ms": {
+            "p50": round(percentile(repost_latencies, 50) * 1000, 2),
+            "p99": round(percentile(repost_latencies, 99) * 1000, 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--channels", type=int, default=100)
+    _ = parser.add_argument("--rate", type=float, default=2000, help="messages per second across all channels")
+    _ = parser.add_argument("--duration", type=float, default=10)
+    _ = parser.add_argument("--speed", type=int, default=5, help="messages between reposts of message pins")
+    _ = parser.add_argument("--seconds", type=int, default=10, help="seconds between reposts of time pins")
+    _ = parser.add_argument("--seconds-share", type=float, default=0.1, help="share of pins that are time based")
+    _ = parser.add_argument("--min-repost-interval", type=float, default=1.0)
+    _ = parser.add_argument("--latency-ms", type=float, default=80, help="simulated Discord API latency")
+    _ = parser.add_argument("--profile", choices=("default", "lean"), default="default")
+    _ = parser.add_argument("--write-behind", action="store_true")
+    _ = parser.add_argument("--seed", type=int, default=0)
+    _ = parser.add_argument("--json", type=Path, help="also write the results to this file")
+    _ = parser.add_argument("--min-messages-per-s", type=float, help="fail if fewer messages/s were counted")
+    _ = parser.add_argument("--min-reposts-per-s", type=float, help="fail if fewer reposts/s were sent")
+    _ = parser.add_argument("--max-loop-lag-p99-ms", type=float, help="fail if p99 loop lag is above this")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)  # keep per-event debug logging out of the measurement
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if args.json is not None:
+        _ = args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    failures: list[str] = []
+    counted = results["messages_counted_per_s"]
+    if args.min_messages_per_s is not None and counted < args.min_messages_per_s:
+        failures.append(f"counted {counted} messages/s, expected >= {args.min_messages_per_s}")
+    reposts = results["reposts_per_s"]
+    if args.min_reposts_per_s is not None and reposts < args.min_reposts_per_s:
+        failures.append(f"sent {reposts} reposts/s, expected >= {args.min_reposts_per_s}")
+    if args.max_loop_lag_p99_ms is not None and results["loop_lag_ms"]["p99"] > args.max_loop_lag_p99_ms:
+        failures.append(f"p99 loop lag {results['loop_lag_ms']['p99']}ms, expected <= {args.max_loop_lag_p99_ms}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+In-process stand-ins for the Discord gateway and HTTP API, so a PinformationBot can be driven offline.
+
+FakeGateway feeds synthetic MESSAGE_CREATE payloads straight into the bot's gateway parsers, and FakeDiscordHTTP
+replaces the HTTP client's request method with one that answers the message routes after a simulated latency.
+"""
+
+import asyncio
+import random
+from collections import Counter, deque
+from datetime import UTC, datetime
+from typing import Any
+
+import discord
+from discord.http import Route
+
+from pinformation_bot.pinformation import PinformationBot
+
+GUILD_ID = 1 << 22
+BOT_ID = GUILD_ID + 1
+FIRST_CHANNEL_ID = GUILD_ID + 1000
+
+
+class Snowflakes:
+    """Increasing ids shared by gateway and HTTP messages, so message ids order the same way Discord's do."""
+
+    def __init__(self) -> None:
+        self._next: int = discord.utils.time_snowflake(datetime.now(UTC))
+
+    def next(self) -> int:
+        self._next += 1
+        return self._next
+
+
+class FakeGateway:
+    """A guild of `channel_count` text channels whose messages are parsed as if they came from the gateway."""
+
+    def __init__(self, bot: PinformationBot, channel_count: int, snowflakes: Snowflakes) -> None:
+        self.bot: PinformationBot = bot
+        self.snowflakes: Snowflakes = snowflakes
+        self.channel_ids: list[int] = [FIRST_CHANNEL_ID + index for index in range(channel_count)]
+        self.dispatched: int = 0
+
+    def install(self) -> None:
+        state = self.bot._connection  # pyright: ignore[reportPrivateUsage]
+        state.user = discord.ClientUser(
+            state=state, data={"id": BOT_ID, "username": "pinformation", "discriminator": "0", "avatar": None}
+        )
+        _ = state._add_guild_from_data(  # pyright: ignore[reportPrivateUsage]
+            {
+                "id": GUILD_ID,
+                "name": "benchmark",
+                "member_count": 1,
+                "roles": [],
+                "channels": [
+                    {"id": channel_id, "type": 0, "name": f"channel-{index}", "position": index}
+                    for index, channel_id in enumerate(self.channel_ids)
+                ],
+            }  # pyright: ignore[reportArgumentType]
+        )
+
+    def message_payload(
+        self, channel_id: int, author_id: int, content: str, bot: bool = False, message_id: int | None = None
+    ) -> dict[str, Any]:
+        return {
+            "id": str(message_id or self.snowflakes.next()),
+            "channel_id": str(channel_id),
+            "guild_id": str(GUILD_ID),
+            "author": {
+                "id": str(author_id),
+                "username": f"user{author_id}",
+                "discriminator": "0",
+                "avatar": None,
+                "bot": bot,
+            },
+            "member": {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False},
+            "content": content,
+            "timestamp": datetime.now(UTC).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+
+    def message_create(
+        self, channel_id: int, author_id: int, content: str, bot: bool = False, message_id: int | None = None
+    ) -> None:
+        self.bot._connection.parsers["MESSAGE_CREATE"](  # pyright: ignore[reportPrivateUsage]
+            self.message_payload(channel_id, author_id, content, bot, message_id)
+        )
+        self.dispatched += 1
+
+
+class FakeDiscordHTTP:
+    """
+    Answers create and delete message requests after `latency` ± `jitter` seconds. Requests over Discord's per-channel
+    limits (5 sends per 5s, 5 deletes per 1s) wait for their window to reopen, like discord.py does after a 429.
+    Sent messages are echoed back through the gateway, as Discord does for the bot's own messages.
+    """
+
+    LIMITS: dict[str, tuple[int, float]] = {"POST": (5, 5.0), "DELETE": (5, 1.0)}
+
+    def __init__(
+        self, gateway: FakeGateway, latency: float = 0.08, jitter: float = 0.02, seed: int | None = None
+    ) -> None:
+        self.gateway: FakeGateway = gateway
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.requests: Counter[str] = Counter()
+        self.rate_limited: int = 0
+        self._random: random.Random = random.Random(seed)  # noqa: S311
+        self._windows: dict[tuple[str, int], deque[float]] = {}
+
+    def install(self) -> None:
+        self.gateway.bot.http.request = self.request  # pyright: ignore[reportAttributeAccessIssue]
+
+    def _reserve(self, method: str, channel_id: int) -> float:
+        """Book the next free slot in the channel's rate limit window and return how long to wait for it."""
+        limit, per = self.LIMITS[method]
+        window = self._windows.setdefault((method, channel_id), deque(maxlen=limit))
+        now = asyncio.get_running_loop().time()
+        start = now
+        if len(window) == limit and window[0] + per > now:
+            start = window[0] + per
+            self.rate_limited += 1
+        window.append(start)
+        return start - now
+
+    async def request(self, route: Route, **_kwargs: Any) -> Any:
+        channel_id = int(route.channel_id or 0)
+        self.requests[route.method] += 1
+        wait = self._reserve(route.method, channel_id) if route.method in self.LIMITS else 0.0
+        await asyncio.sleep(wait + max(self._random.gauss(self.latency, self.jitter), 0.0))
+        if route.method == "POST" and route.path.endswith("/messages"):
+            message_id = self.gateway.snowflakes.next()
+            self.gateway.message_create(channel_id, BOT_ID, "pin", bot=True, message_id=message_id)
+            return self.gateway.message_payload(channel_id, BOT_ID, "pin", bot=True, message_id=message_id)
+        return None
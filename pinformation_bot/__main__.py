@@ -1,27 +1,32 @@
 import logging
+import sys
 from os import environ
 
 from dotenv import load_dotenv
 
 from pinformation_bot.bot_config import JSON_FILE, BotConfig
-from pinformation_bot.pinformation import PinformationBot
+from pinformation_bot.logging_setup import setup_logging
+from pinformation_bot.pinformation import create_bot
 
-logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger(__name__)
 
 
-def main() -> None:
+def main() -> int:
     loaded_config: BotConfig = BotConfig.load_from_json(JSON_FILE)
-
-    bot = PinformationBot(config=loaded_config)
-    bot.run(environ.get("DISCORD_TOKEN", ""))
+    listener = setup_logging(loaded_config)
+    log.info("Starting bot...")
+    try:
+        bot = create_bot(loaded_config)
+        # logging is already set up, so stop discord.py from adding its own handler
+        bot.run(environ.get("DISCORD_TOKEN", ""), log_handler=None)
+    except Exception:
+        log.critical("Bot stopped with an unhandled exception:", exc_info=True)
+        return 1  # ensure the script gets restarted by the docker container if running in docker.
+    finally:
+        listener.stop()  # flushes whatever is still queued, including the error above
+    return 0
 
 
 if __name__ == "__main__":
     _ = load_dotenv()
-    try:
-        log.info("Starting bot...")
-        main()
-    except Exception as e:
-        log.info(f"Unhandled exception raised: {e}")
-        exit(1)  # ensure the script gets restarted by the docker container if running in docker.
+    sys.exit(main())
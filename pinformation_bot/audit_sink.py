@@ -0,0 +1,143 @@
+import logging
+import random
+from asyncio import Queue, QueueFull, Task, create_task, sleep, timeout
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+import discord
+
+if TYPE_CHECKING:
+    from .pinformation import PinformationBot
+
+log = logging.getLogger(__name__)
+
+EMBEDS_PER_MESSAGE = 10  # Discord's limits
+EMBED_CHARS_PER_MESSAGE = 6000  # combined text of every embed in one message
+
+
+class AuditSink:
+    """
+    Queues audit log embeds for the log channel and sends them in batches of up to 10 per message and 6000
+    characters of embed text, once a batch is full or `flush_interval` seconds after its first entry. Sends go through
+    the bot's send governor like reposts do. A batch Discord rejects as invalid is split in half and resent, other
+    failures are retried with backoff up to `max_attempts` times.
+    Commands never wait on the log channel: when the queue is full, entries are dropped and the number dropped
+    is reported with the next batch.
+    """
+
+    def __init__(
+        self,
+        bot: PinformationBot,
+        max_queue: int = 500,
+        flush_interval: float = 2.0,
+        max_attempts: int = 5,
+        backoff: float = 2.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.bot: PinformationBot = bot
+        self.flush_interval: float = flush_interval
+        self.max_attempts: int = max_attempts
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.sent: int = 0
+        self.dropped: int = 0
+        self._unreported_drops: int = 0
+        self._queue: Queue[discord.Embed] = Queue(maxsize=max_queue)
+        self._carry: discord.Embed | None = None  # taken off the queue but didn't fit in the last batch
+        self._task: Task[None] | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = create_task(self._run(), name="audit-sink")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Give queued entries a chance to go out, then stop the sender."""
+        if self._task is None:
+            return
+        with suppress(TimeoutError):
+            async with timeout(drain_timeout):
+                await self._queue.join()
+        _ = self._task.cancel()
+        self._task = None
+
+    def submit(self, embed: discord.Embed) -> bool:
+        """Queue an entry for the log channel. Returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait(embed)
+        except QueueFull:
+            self.dropped += 1
+            self._unreported_drops += 1
+            return False
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            first = self._carry if self._carry is not None else await self._queue.get()
+            self._carry = None
+            batch, chars = [first], len(first)
+            with suppress(TimeoutError):
+                async with timeout(self.flush_interval):
+                    while len(batch) < EMBEDS_PER_MESSAGE:
+                        embed = await self._queue.get()
+                        if chars + len(embed) > EMBED_CHARS_PER_MESSAGE:
+                            self._carry = embed  # starts the next batch
+                            break
+                        batch.append(embed)
+                        chars += len(embed)
+            try:
+                await self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send(self, batch: list[discord.Embed]) -> None:
+        if (channel := self.bot.log_channel) is None:
+            log.info(f"No log channel set, discarding {len(batch)} audit log entries")
+            return
+        content = None
+        if drops := self._unreported_drops:
+            self._unreported_drops = 0
+            content = f"{drops} audit log entries were dropped because the queue was full."
+            log.warning(content)
+        await self._deliver(channel, batch, content)
+
+    async def _deliver(self, channel: discord.TextChannel, batch: list[discord.Embed], content: str | None) -> None:
+        attempt = 0
+        while True:
+            try:
+                _ = await self.bot.governor.acquire_send(channel.id)
+                _ = await channel.send(content=content, embeds=batch)
+                self.sent += len(batch)
+                return
+            except discord.Forbidden, discord.NotFound:
+                log.exception(f"Can't send {len(batch)} audit log entries to the log channel:")
+                self.dropped += len(batch)
+                return
+            except discord.HTTPException as error:
+                if 400 <= error.status < 500 and error.status != 429:
+                    await self._split(channel, batch, content)
+                    return
+                log.warning(f"Failed to send {len(batch)} audit log entries ({error.status}), will retry")
+            except OSError:
+                log.warning(f"Failed to send {len(batch)} audit log entries, will retry")
+            attempt += 1
+            if attempt >= self.max_attempts:
+                log.error(f"Giving up on {len(batch)} audit log entries after {attempt} attempts")
+                self.dropped += len(batch)
+                return
+            delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+            await sleep(delay * random.uniform(0.5, 1.0))  # noqa: S311
+
+    async def _split(self, channel: discord.TextChannel, batch: list[discord.Embed], content: str | None) -> None:
+        """Resend a batch Discord rejected as two halves, until the entry it can't take is on its own."""
+        if len(batch) == 1:
+            log.warning(f"Dropping an audit log entry Discord rejected: {batch[0].title!r:.100}")
+            self.dropped += 1
+            return
+        half = len(batch) // 2
+        await self._deliver(channel, batch[:half], content)
+        await self._deliver(channel, batch[half:], None)
@@ -1,5 +1,9 @@
+import os
+import tempfile
+from contextlib import suppress
 from logging import getLogger
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -8,6 +12,28 @@ CONFIG_FOLDER = Path(__file__).parent / "config"
 JSON_FILE = Path(CONFIG_FOLDER / "config.json")
 
 
+def write_text_atomic(path: Path, text: str) -> int:
+    """
+    Replace `path` with `text` by writing a temp file next to it and renaming it over the original,
+    so a crash mid-write never leaves a truncated file behind. Returns the new file's mtime in ns.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            _ = tmp_file.write(text)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        with suppress(FileNotFoundError):
+            tmp_path.chmod(path.stat().st_mode)
+        _ = tmp_path.replace(path)
+    except BaseException:
+        with suppress(OSError):
+            tmp_path.unlink()
+        raise
+    return path.stat().st_mtime_ns
+
+
 class BotConfig(BaseModel):
     """
     BaseModel for the configuration of the bot. Should be originally instantiated
@@ -21,10 +47,36 @@ class BotConfig(BaseModel):
     embed_color: int
     cogs: list[str] = Field(default_factory=list)
     debug: bool = False
+    db_write_behind: bool = False
+    db_flush_interval: float = 0.25
+    min_repost_interval: float = 1.0
+    rate_global_limit: int = 50  # sends and deletes allowed every rate_global_per seconds, across all channels
+    rate_global_per: float = 1.0
+    rate_channel_sends: int = 5  # sends allowed per channel every rate_channel_send_per seconds
+    rate_channel_send_per: float = 5.0
+    rate_channel_deletes: int = 5  # deletes allowed per channel every rate_channel_delete_per seconds
+    rate_channel_delete_per: float = 1.0
+    restore_concurrency: int = 8
+    bulk_concurrency: int = 4
+    sharded: bool = False
+    shard_count: int | None = None  # None lets Discord recommend a shard count
+    cluster: bool = False
+    cluster_partitions: int = 16
+    cluster_lease_ttl: float = 30.0
+    cluster_worker_id: str | None = None  # defaults to <hostname>-<pid>
+    gateway_profile: Literal["default", "lean"] = "default"  # lean: non-command guild messages skip on_message
+    config_write_delay: float = 1.0
+    config_poll_interval: float = 5.0  # 0 disables reloading config.json when it changes on disk
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int | None = None  # None disables the Prometheus metrics endpoint
+    loop_lag_interval: float = 0.5
+    slow_callback_threshold: float | None = None  # seconds. None disables the slow callback detector
+    log_level: str = "INFO"  # overridden by the LOG_LEVEL environment variable
+    log_format: Literal["json", "text"] = "json"
 
-    def write_config_to_json(self) -> None:
-        log.debug(f"Opening config file at: {JSON_FILE}")
-        _ = JSON_FILE.write_text(self.model_dump_json(indent=4), encoding="utf-8")
+    def write_config_to_json(self, path: Path = JSON_FILE) -> None:
+        log.debug(f"Opening config file at: {path}")
+        _ = write_text_atomic(path, self.model_dump_json(indent=4))
         log.debug("Finished writing to config file")
 
     @classmethod
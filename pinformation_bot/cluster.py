@@ -0,0 +1,81 @@
+import logging
+import os
+import socket
+from asyncio import Task, create_task, sleep, to_thread
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .pinformation import PinformationBot
+
+log = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ClusterCoordinator:
+    """
+    Keeps this worker's pin partition leases alive in the shared pin database.
+    Guilds are split into `partitions` partitions by `(guild_id >> 22) % partitions`, the same formula Discord
+    uses for shards. Each heartbeat renews this worker's leases and rebalances them against the other live
+    workers; partitions that change hands are announced through the `partitions_gained` and `partitions_lost`
+    bot events. If the leases can't be renewed before they expire, every partition is treated as lost.
+    """
+
+    def __init__(self, bot: PinformationBot, worker_id: str, partitions: int, lease_ttl: float) -> None:
+        self.bot: PinformationBot = bot
+        self.worker_id: str = worker_id
+        self.partitions: int = partitions
+        self.lease_ttl: float = lease_ttl
+        self.owned: frozenset[int] = frozenset()
+        self._last_renewed: float = 0.0
+        self._task: Task[None] | None = None
+
+    def partition_of(self, guild_id: int | None) -> int:
+        """Partition a guild belongs to. Pins and commands outside a guild belong to partition 0."""
+        return (guild_id >> 22) % self.partitions if guild_id is not None else 0
+
+    def owns_guild(self, guild_id: int | None) -> bool:
+        return self.partition_of(guild_id) in self.owned
+
+    async def start(self) -> None:
+        """Claim this worker's initial partitions, then keep heartbeating in the background."""
+        await self.heartbeat()
+        log.info(f"Cluster worker {self.worker_id} owns partitions {sorted(self.owned)} of {self.partitions}")
+        self._task = create_task(self._run(), name="cluster-heartbeat")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            self._task = None
+        self.owned = frozenset()
+        await to_thread(self.bot.database.release_partitions, self.worker_id)
+
+    async def heartbeat(self) -> None:
+        try:
+            owned = frozenset(
+                await to_thread(self.bot.database.claim_partitions, self.worker_id, self.partitions, self.lease_ttl)
+            )
+            self._last_renewed = monotonic()
+        except Exception:
+            log.exception("Failed to renew cluster leases:")
+            if monotonic() - self._last_renewed < self.lease_ttl:
+                return
+            log.warning("Cluster leases expired before they could be renewed. Dropping every partition.")
+            owned = frozenset()
+
+        gained, lost = owned - self.owned, self.owned - owned
+        self.owned = owned
+        if lost:
+            log.info(f"Lost cluster partitions {sorted(lost)}")
+            self.bot.dispatch("partitions_lost", lost)
+        if gained:
+            log.info(f"Gained cluster partitions {sorted(gained)}")
+            self.bot.dispatch("partitions_gained", gained)
+
+    async def _run(self) -> None:
+        while True:
+            await sleep(self.lease_ttl / 3)
+            await self.heartbeat()
@@ -0,0 +1,241 @@
+import logging
+import re
+from asyncio import Semaphore, gather
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+
+import discord
+from discord.ext import commands
+
+from ..pinformation import PinformationBot
+from ..pins import PinUnion, SpeedTypes
+from ..utils.channel_lock import ChannelLock
+from ..utils.utils import check_admin
+from .pin_cog import PinCog
+
+log = logging.getLogger(__name__)
+"""
+This cog runs pin commands across many channels at once: a category, a list of channels or a whole server.
+Targets are resolved and checked once, DB rows are written in a single transaction, pins are sent with a bounded
+number of channels in flight (each send still goes through the send governor), and one audit entry sums it all up.
+"""
+
+CHANNEL_ID = re.compile(r"\d{15,20}")
+WHOLE_GUILD = ("all", "server", "guild")
+
+type PinChannel = discord.TextChannel | discord.VoiceChannel
+
+
+def resolve_targets(guild: discord.Guild, target: str) -> list[PinChannel]:
+    """
+    Channels named by `target`: "all" for every text channel in the server, channel or category mentions/ids
+    (categories expand to their text channels), or a category name.
+    """
+    if target.strip().lower() in WHOLE_GUILD:
+        return list(guild.text_channels)
+    channels: dict[int, PinChannel] = {}
+    if ids := CHANNEL_ID.findall(target):
+        found = [guild.get_channel(int(channel_id)) for channel_id in ids]
+    else:
+        found = [discord.utils.find(lambda category: category.name.lower() == target.strip().lower(), guild.categories)]
+    for channel in found:
+        if isinstance(channel, discord.CategoryChannel):
+            channels.update((child.id, child) for child in channel.text_channels)
+        elif isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
+            channels[channel.id] = channel
+    return list(channels.values())
+
+
+class BulkCog(commands.Cog, name="Bulk"):
+    def __init__(self, pin_bot: PinformationBot) -> None:
+        self.bot: PinformationBot = pin_bot
+
+    @property
+    def pin_cog(self) -> PinCog | None:
+        return self.bot.get_cog("Pin")  # pyright: ignore[reportReturnType]
+
+    def _has_active_pin(self, channel_id: int) -> bool:
+        return (pin := self.bot.pins.get(channel_id)) is not None and pin.active
+
+    async def _prepare(
+        self, ctx: commands.Context[PinformationBot], target: str, need_pin: bool = False
+    ) -> tuple[PinCog, list[PinChannel]] | None:
+        """Resolve and validate the targets once, replying with why nothing can be done if that's the case."""
+        if ctx.guild is None:
+            _ = await ctx.reply("Bulk commands can only be used in a server.", ephemeral=True)
+            return None
+        if (pin_cog := self.pin_cog) is None:
+            _ = await ctx.reply("The pin cog isn't loaded!", ephemeral=True)
+            return None
+        me = ctx.guild.me
+        channels = [
+            channel
+            for channel in resolve_targets(ctx.guild, target)
+            if channel.permissions_for(me).send_messages and (not need_pin or self._has_active_pin(channel.id))
+        ]
+        if not channels:
+            _ = await ctx.reply(f"No channels{' with pins' if need_pin else ''} found for `{target}`!", ephemeral=True)
+            return None
+        _ = await ctx.defer(ephemeral=True)  # sends are paced, so this can outlast the interaction's 3 seconds
+        return pin_cog, channels
+
+    async def _run(
+        self, channels: list[PinChannel], action: Callable[[PinChannel], Awaitable[PinUnion | None]]
+    ) -> tuple[list[PinUnion], list[int]]:
+        """Run `action` on every channel under its lock, a bounded number of channels at a time."""
+        limit = Semaphore(max(self.bot.config.bulk_concurrency, 1))
+        changed: list[PinUnion] = []
+        failed: list[int] = []
+
+        async def run_one(channel: PinChannel) -> None:
+            async with limit, ChannelLock(channel.id):
+                try:
+                    if (pin := await action(channel)) is not None:
+                        changed.append(pin)
+                except Exception:
+                    log.exception(f"Bulk command failed in channel {channel.name}:")
+                    failed.append(channel.id)
+
+        _ = await gather(*(run_one(channel) for channel in channels))
+        return changed, failed
+
+    async def _finish(
+        self,
+        ctx: commands.Context[PinformationBot],
+        command_type: str,
+        changed: list[PinUnion],
+        failed: list[int],
+        pin: PinUnion | None = None,
+    ) -> None:
+        channel_ids = [changed_pin.channel_id for changed_pin in changed]
+        msg = f"{command_type} in {len(changed)} channels" + (f", {len(failed)} failed." if failed else ".")
+        _ = await ctx.reply(msg, ephemeral=True)
+        await self.bot.log_bulk_change(ctx, command_type, channel_ids, failed, pin)
+
+    @commands.hybrid_command(name="bulkpintext")
+    @commands.check(check_admin)
+    async def bulk_pin_text(
+        self,
+        ctx: commands.Context[PinformationBot],
+        target: str,
+        *,
+        text: str,
+        speed: int = 1,
+        speed_type: SpeedTypes = SpeedTypes.messages,
+    ):
+        """Pin the same text to every channel in `target`: a category, channel mentions, or "all"."""
+        if (prepared := await self._prepare(ctx, target)) is None:
+            return
+        pin_cog, channels = prepared
+
+        async def pin_channel(channel: PinChannel) -> PinUnion:
+            return await pin_cog._create_text_pin(channel, channel.id, text, speed, speed_type, save=False)  # pyright: ignore[reportPrivateUsage]
+
+        changed, failed = await self._run(channels, pin_channel)
+        self.bot.database.save_pins(changed)
+        await self._finish(ctx, "Added Text Pin", changed, failed, changed[0] if changed else None)
+
+    @commands.hybrid_command(name="bulkpinembed")
+    @commands.check(check_admin)
+    async def bulk_pin_embed(
+        self,
+        ctx: commands.Context[PinformationBot],
+        target: str,
+        *,
+        text: str | None = None,
+        title: str | None = None,
+        url: str | None = None,
+        image: str | None = None,
+        color: int | None = None,
+        speed: int = 1,
+        speed_type: SpeedTypes = SpeedTypes.messages,
+    ):
+        """Pin the same embed to every channel in `target`: a category, channel mentions, or "all"."""
+        if not any((text, title, image)):
+            _ = await ctx.reply("You must provide at least one of text, title, or image!", ephemeral=True)
+            return
+        if (prepared := await self._prepare(ctx, target)) is None:
+            return
+        pin_cog, channels = prepared
+
+        async def pin_channel(channel: PinChannel) -> PinUnion:
+            return await pin_cog._create_embed_pin(  # pyright: ignore[reportPrivateUsage]
+                channel, channel.id, title or url, text or "", url, image, color, speed, speed_type, save=False
+            )
+
+        changed, failed = await self._run(channels, pin_channel)
+        self.bot.database.save_pins(changed)
+        await self._finish(ctx, "Added Embed Pin", changed, failed, changed[0] if changed else None)
+
+    @commands.hybrid_command(name="bulkpinstop")
+    @commands.check(check_admin)
+    async def bulk_pin_stop(self, ctx: commands.Context[PinformationBot], target: str):
+        """Stop the pins in every channel in `target`: a category, channel mentions, or "all"."""
+        if (prepared := await self._prepare(ctx, target, need_pin=True)) is None:
+            return
+        pin_cog, channels = prepared
+
+        async def stop_channel(channel: PinChannel) -> PinUnion | None:
+            if (pin := self.bot.pins.get(channel.id)) is None or not pin.active:
+                return None
+            pin_cog._stop_pin(channel, pin)  # pyright: ignore[reportPrivateUsage]
+            return pin
+
+        changed, failed = await self._run(channels, stop_channel)
+        self.bot.database.remove_pins(pin.channel_id for pin in changed)
+        for pin in changed:
+            ChannelLock.cleanup(pin.channel_id)
+        await self._finish(ctx, "Removed Pin", changed, failed)
+
+    @commands.hybrid_command(name="bulkupdatetext")
+    @commands.check(check_admin)
+    async def bulk_update_text(self, ctx: commands.Context[PinformationBot], target: str, *, text: str):
+        """Update the text of the pins in every channel in `target`: a category, channel mentions, or "all"."""
+        if (prepared := await self._prepare(ctx, target, need_pin=True)) is None:
+            return
+        _pin_cog, channels = prepared
+
+        async def update_channel(channel: PinChannel) -> PinUnion | None:
+            if (pin := self.bot.pins.get(channel.id)) is None or not pin.active:
+                return None
+            self.bot.deletions.submit(pin, pin.last_message)
+            pin.update_content("text", text)
+            message = await self.bot.send_pin(pin, channel)
+            pin.last_message = message.id
+            pin.last_message_dt = datetime.now(UTC)
+            return pin
+
+        changed, failed = await self._run(channels, update_channel)
+        self.bot.database.save_pins(changed)
+        await self._finish(ctx, "Updated pin text", changed, failed)
+
+    @commands.hybrid_command(name="bulkpinspeed")
+    @commands.check(check_admin)
+    async def bulk_pin_speed(
+        self,
+        ctx: commands.Context[PinformationBot],
+        target: str,
+        speed: int,
+        speed_type: SpeedTypes | None = None,
+    ):
+        """Set the speed of the pins in every channel in `target`: a category, channel mentions, or "all"."""
+        if (prepared := await self._prepare(ctx, target, need_pin=True)) is None:
+            return
+        pin_cog, channels = prepared
+
+        async def set_speed(channel: PinChannel) -> PinUnion | None:
+            if (pin := self.bot.pins.get(channel.id)) is None or not pin.active:
+                return None
+            pin.speed = speed
+            if speed_type is not None:
+                pin.speed_type = speed_type
+            pin_cog.scheduler.disarm(channel.id)
+            return pin
+
+        changed, failed = await self._run(channels, set_speed)
+        self.bot.database.save_pins(changed)
+        await self._finish(ctx, f"Changed speed to {speed} {speed_type or ''}".rstrip(), changed, failed)
+
+
+async def setup(bot: PinformationBot):
+    await bot.add_cog(BulkCog(bot))
@@ -21,7 +21,6 @@ class DebugCog(commands.Cog):
         self.bot.log_action(ctx, "Shut down the bot")
         _ = await ctx.reply("Shutting down...", ephemeral=True)
         await sleep(1)
-        self.bot.database.db.close()
         await self.bot.close()
         exit()
 
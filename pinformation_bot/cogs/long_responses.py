@@ -25,4 +25,12 @@ help_management = [
     {"name": "manageadmin", "value": "• Add or remove a user from the bot's admin permissions list."},
     {"name": "manageadminrole", "value": "• Add or remove a role from the bot's admin permissions list."},
     {"name": "managerole", "value": "• Add or remove a role to a particular channel's permissions list."},
+    {"name": "synccommands", "value": "• Force the bot's slash commands to sync with Discord."},
+    {
+        "name": "bulkpintext|bulkpinembed|bulkpinstop|bulkupdatetext|bulkpinspeed",
+        "value": (
+            "• Run a pin command in many channels at once. The first argument is a category (name or id), "
+            'channel mentions, or "all" for the whole server.'
+        ),
+    },
 ]
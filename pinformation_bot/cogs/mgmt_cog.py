@@ -1,12 +1,15 @@
-from datetime import UTC, datetime
+from asyncio import all_tasks
+from datetime import UTC, datetime, timedelta
 from importlib.metadata import version
 from logging import getLogger
+from time import monotonic
 from typing import Literal
 
 import discord
 from discord.ext import commands
 
-from ..pinformation import PinformationBot
+from ..pinformation import PinformationBot, ShardedPinformationBot
+from ..utils.channel_lock import ChannelLock
 from ..utils.utils import check_admin
 
 log = getLogger(__name__)
@@ -39,6 +42,61 @@ class ManagementCog(commands.Cog, name="Main"):
         _ = embed.add_field(name="Version", value=version("pinformation_bot"))
         _ = embed.add_field(name="Prefix", value=f"`{self.bot.config.prefix}`")
         _ = embed.add_field(name="Ping", value=f"`{round(self.bot.latency * 1000)}`ms")
+        if isinstance(self.bot, ShardedPinformationBot):
+            _ = embed.add_field(name="Shards", value=self._shard_summary(self.bot), inline=False)
+        _ = await ctx.reply(embed=embed, mention_author=False, ephemeral=True)
+
+    @staticmethod
+    def _shard_summary(bot: ShardedPinformationBot, max_lines: int = 20) -> str:
+        shard_count = bot.shard_count or 1
+        lines = [
+            f"`#{shard_id}` {round(latency * 1000)}ms · {bot.shard_messages[shard_id]} msgs · "
+            + f"{len(bot.pins.for_shard(shard_id, shard_count))} pins"
+            for shard_id, latency in bot.latencies[:max_lines]
+        ]
+        if len(bot.latencies) > max_lines:
+            lines.append(f"...and {len(bot.latencies) - max_lines} more")
+        return "\n".join(lines) or "No shards connected"
+
+    @commands.hybrid_command(name="botstats")
+    @commands.check(check_admin)
+    async def stats_embed(self, ctx: commands.Context[PinformationBot]):
+        """
+        Show diagnostics about the bot's event loop and pin engine.
+        """
+        monitor = self.bot.loop_monitor
+        embed = discord.Embed(title="Pinformation Bot Stats", color=self.bot.config.embed_color)
+        _ = embed.add_field(
+            name="Loop lag",
+            value=f"`{monitor.current_lag * 1000:.1f}`ms now · `{monitor.lag_percentile(99) * 1000:.1f}`ms p99 · "
+            + f"`{monitor.max_lag * 1000:.1f}`ms max",
+            inline=False,
+        )
+        _ = embed.add_field(name="Tasks", value=f"`{len(all_tasks())}`")
+        _ = embed.add_field(name="Pins", value=f"`{len(self.bot.pins)}`")
+        _ = embed.add_field(name="DB queue", value=f"`{self.bot.database.queue_depth}`")
+        _ = embed.add_field(name="Uptime", value=f"`{timedelta(seconds=int(monotonic() - self.bot.started_at))}`")
+        locks = ChannelLock.manager
+        _ = embed.add_field(
+            name="Channel locks",
+            value=f"`{len(locks)}` kept · `{locks.contended}` contended · `{locks.timeouts}` timed out · "
+            + f"`{locks.evicted}` evicted",
+            inline=False,
+        )
+        if contended := locks.most_contended(3):
+            _ = embed.add_field(
+                name="Most contended locks",
+                value="\n".join(
+                    f"<#{channel_id}>: `{stats.contended}` waits, `{stats.wait_max * 1000:.0f}`ms max wait, "
+                    + f"`{stats.hold_max * 1000:.0f}`ms max hold"
+                    for channel_id, stats in contended
+                ),
+                inline=False,
+            )
+        if monitor.slow_callbacks:
+            stall = monitor.slow_callbacks[-1]
+            blocked = f"{stall.duration * 1000:.0f}ms" if stall.duration is not None else "ongoing"
+            _ = embed.add_field(name="Last slow callback", value=f"{blocked} in `{stall.location:.200}`", inline=False)
         _ = await ctx.reply(embed=embed, mention_author=False, ephemeral=True)
 
     @commands.hybrid_command(name="manageadmin")
@@ -66,7 +124,7 @@ class ManagementCog(commands.Cog, name="Main"):
             msg = f"Removed {user.name} (`{user_id}`) from admin permissions"
             await self.log_mgmt_change(ctx, msg)
             _ = await ctx.reply(msg, ephemeral=True)
-        self.bot.config.write_config_to_json()
+        self.bot.save_config()
 
     @commands.hybrid_command(name="manageadminrole")
     @commands.check(check_admin)
@@ -93,7 +151,7 @@ class ManagementCog(commands.Cog, name="Main"):
             msg = f"Removed {role.name} (`{role.id}`) from admin permissions"
             await self.log_mgmt_change(ctx, msg)
             _ = await ctx.reply(msg, ephemeral=True)
-        self.bot.config.write_config_to_json()
+        self.bot.save_config()
 
     @commands.hybrid_command(name="managerole")
     @commands.check(check_admin)
@@ -133,7 +191,7 @@ class ManagementCog(commands.Cog, name="Main"):
             msg = f"Removed {channel.mention} from {role.name} permitted list"
             await self.log_mgmt_change(ctx, msg)
             _ = await ctx.reply(msg, ephemeral=True)
-        self.bot.config.write_config_to_json()
+        self.bot.save_config()
 
     @commands.hybrid_command(name="setlogchannel")
     @commands.check(check_admin)
@@ -142,12 +200,24 @@ class ManagementCog(commands.Cog, name="Main"):
         Set the log channel for the bot.
         """
         self.bot.config.log_channel = str(channel.id)
-        self.bot.config.write_config_to_json()
+        self.bot.save_config()
         await self.bot.set_log_channel()
         msg = f"Set log channel to {channel.mention}({channel.id})"
         await self.log_mgmt_change(ctx, msg)
         _ = await ctx.reply(msg, ephemeral=True)
 
+    @commands.hybrid_command(name="synccommands")
+    @commands.check(check_admin)
+    async def sync_commands(self, ctx: commands.Context[PinformationBot]):
+        """
+        Force a sync of the bot's slash commands with Discord, even if they look unchanged.
+        """
+        _ = await ctx.defer(ephemeral=True)
+        synced = await self.bot.sync_commands(force=True)
+        msg = f"Synced {synced} slash commands"
+        await self.log_mgmt_change(ctx, msg)
+        _ = await ctx.reply(msg, ephemeral=True)
+
     async def log_mgmt_change(self, ctx: commands.Context[PinformationBot], cmd_msg: str) -> None:
         self.bot.log_action(ctx, cmd_msg)
         if self.bot.log_channel is None:
@@ -157,7 +227,7 @@ class ManagementCog(commands.Cog, name="Main"):
         embed = discord.Embed(title=f"{msg}", timestamp=datetime.now(tz=UTC))
         _ = embed.add_field(name="User", value=ctx.author.mention)
 
-        _ = await self.bot.log_channel.send(embed=embed)
+        _ = self.bot.audit.submit(embed)
 
 
 async def setup(bot: PinformationBot):
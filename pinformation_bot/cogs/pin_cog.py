@@ -1,40 +1,152 @@
 import logging
-from asyncio import Task, create_task, gather
-from collections.abc import Coroutine
-from datetime import UTC, datetime, timedelta
-from typing import cast
+from asyncio import Semaphore, create_task, gather
+from collections import Counter
+from collections.abc import Callable, Coroutine
+from datetime import UTC, datetime
+from time import monotonic, perf_counter
+from typing import Literal, override
 
 import discord
 from discord.ext import commands
-from discord.message import Message, PartialMessage
-from discord.state import TextChannel
+from discord.message import PartialMessage
 
+from ..metrics import REPOST_LATENCY_BUCKETS, Histogram
 from ..pinformation import PinformationBot
 from ..pins import EmbedPin, PinUnion, SpeedTypes, TextPin
+from ..repost_policy import count_messages, seconds_until_due
 from ..utils.channel_lock import ChannelLock
-from ..utils.utils import check_permitted, delete_old_message, get_pin, handle_reply
+from ..utils.message_tracker import LatestMessageTracker
+from ..utils.pin_actor import PinActors
+from ..utils.pin_pages import EmbedPages, pin_list_pages
+from ..utils.repost_scheduler import RepostScheduler
+from ..utils.utils import check_permitted, get_pin, handle_reply
 from . import long_responses
 
 log = logging.getLogger(__name__)
 
+type RestoreOutcome = Literal["restored", "failed", "skipped"]
+
+REPOST_LOCK_WAIT = 5.0  # seconds a due repost waits on a command holding the channel lock before giving up
+
 
 class PinCog(commands.Cog, name="Pin"):
     def __init__(self, pin_bot: PinformationBot) -> None:
         self.bot: PinformationBot = pin_bot
+        self.actors: PinActors = PinActors(
+            self._handle_counter, self._repost, min_interval=pin_bot.config.min_repost_interval
+        )
+        self.scheduler: RepostScheduler = RepostScheduler(self._on_deadline)
+        self._pending_restore: dict[int, PinUnion] | None = None
+        self.latest: LatestMessageTracker = LatestMessageTracker()
+        self.messages_counted: int = 0
+        self.reposts_sent: int = 0
+        self.reposts_skipped: int = 0
+        self.repost_latency: Histogram | None = None  # only timed when the metrics endpoint is enabled
+        if pin_bot.metrics is not None:
+            self.repost_latency = Histogram(REPOST_LATENCY_BUCKETS)
+
+    @override
+    async def cog_load(self) -> None:
+        self.scheduler.start()
+
+    @override
+    async def cog_unload(self) -> None:
+        self.actors.stop_all()
+        self.scheduler.stop()
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
         log.info("Pin cog is ready!")
-        await self._restart_active_pins(self.bot.database.get_persisted_pins())
+        # anything a shard didn't claim (e.g. channels missing from the cache) is restored once every shard is up
+        first_ready = self._pending_restore is None  # on_ready fires again after reconnects
+        started = perf_counter()
+        await self._restart_active_pins(self._claim_pending_restore(self.bot.owns_pin))
+        if first_ready:
+            log.info(
+                f"Pin restore took {perf_counter() - started:.2f}s, "
+                + f"ready {monotonic() - self.bot.started_at:.1f}s after startup"
+            )
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id: int) -> None:
+        log.info(f"Shard {shard_id} is ready, restoring its pins...")
+        await self._restart_active_pins(
+            self._claim_pending_restore(lambda pin: self._shard_of(pin) == shard_id and self.bot.owns_pin(pin))
+        )
+
+    @commands.Cog.listener()
+    async def on_partitions_gained(self, partitions: frozenset[int]) -> None:
+        if self.bot.cluster is None:
+            return
+        cluster = self.bot.cluster
+        self.bot.deletions.load(lambda guild_id: cluster.partition_of(guild_id) in partitions)
+        if not self.bot.is_ready():
+            return  # on_ready restores whatever is owned by then
+        pins = [
+            pin
+            for pin in self.bot.database.get_persisted_pins()
+            if pin.channel_id not in self.bot.pins and cluster.partition_of(self.bot.pin_guild_id(pin)) in partitions
+        ]
+        if self._pending_restore is not None:
+            for pin in pins:
+                _ = self._pending_restore.pop(pin.channel_id, None)
+        log.info(f"Taking over {len(pins)} pins from cluster partitions {sorted(partitions)}")
+        await self._restart_active_pins(pins)
+
+    @commands.Cog.listener()
+    async def on_partitions_lost(self, partitions: frozenset[int]) -> None:
+        if self.bot.cluster is None:
+            return
+        cluster = self.bot.cluster
+        self.bot.deletions.drop(lambda guild_id: cluster.partition_of(guild_id) in partitions)
+        lost = [pin for pin in self.bot.pins.values() if cluster.partition_of(self.bot.pin_guild_id(pin)) in partitions]
+        # the new owner deletes and reposts these pins, so only forget them here
+        for pin in lost:
+            _ = self.bot.pins.remove(pin.channel_id)
+            self.actors.stop(pin.channel_id)
+            self.scheduler.disarm(pin.channel_id)
+            self.latest.forget(pin.channel_id)
+        log.info(f"Handed off {len(lost)} pins from cluster partitions {sorted(partitions)}")
+
+    def _shard_of(self, pin: PinUnion) -> int | None:
+        if (channel := self.bot.get_channel(pin.channel_id)) is None or not hasattr(channel, "guild"):
+            return None
+        return channel.guild.shard_id  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+
+    def _claim_pending_restore(self, predicate: Callable[[PinUnion], bool]) -> list[PinUnion]:
+        """Take the persisted pins matching `predicate` that haven't been restored yet. Each pin is claimed once."""
+        if self._pending_restore is None:
+            self._pending_restore = {pin.channel_id: pin for pin in self.bot.database.get_persisted_pins()}
+        claimed = [pin for pin in self._pending_restore.values() if predicate(pin)]
+        for pin in claimed:
+            del self._pending_restore[pin.channel_id]
+        return claimed
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        if message.author.bot or message.content.startswith(self.bot.config.prefix):
+        ignored = message.author.bot or message.content.startswith(self.bot.config.prefix)
+        self._track_message(message.channel, message.id, ignored)
+
+    @commands.Cog.listener()
+    async def on_lean_message(self, channel: discord.abc.Messageable, message_id: int, from_bot: bool) -> None:
+        """Raw message in a pinned channel from the lean gateway profile's fast path."""
+        self._track_message(channel, message_id, from_bot)
+
+    def _track_message(self, channel: discord.abc.Messageable, message_id: int, ignored: bool) -> None:
+        channel_id: int = channel.id  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        if (pin_data := self.bot.pins.get(channel_id)) is None:
             return
-        channel_id = message.channel.id
+        self.latest.seen(channel_id, message_id)
+        if not ignored and pin_data.active:
+            self.actors.post(channel)
 
-        if channel_id in self.bot.pins and (pin_data := self.bot.pins.get(channel_id)) and pin_data.active:
-            await self._handle_counter(pin_data, message)
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        self.latest.deleted(payload.channel_id, (payload.message_id,))
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        self.latest.deleted(payload.channel_id, payload.message_ids)
 
     @commands.hybrid_command(name="pintext")
     @commands.check(check_permitted)
@@ -99,9 +211,7 @@ class PinCog(commands.Cog, name="Pin"):
         if not (pin := await get_pin(ctx, self.bot, channel_id)):
             return
         async with ChannelLock(ctx.channel.id):
-            _ = create_task(delete_old_message(ctx.message.channel, pin.last_message))
-            pin.active = False
-            pin.last_message = None
+            self._stop_pin(ctx.channel, pin)
             _ = await ctx.reply("Removed pin!", ephemeral=ctx.interaction is not None)
             self.bot.database.remove_pin(channel_id)
             ChannelLock.cleanup(channel_id)
@@ -117,10 +227,11 @@ class PinCog(commands.Cog, name="Pin"):
         if not (pin := await get_pin(ctx, self.bot, channel_id)):
             return
         async with ChannelLock(channel_id):
-            new_message = await pin.send_to(ctx.channel)
+            new_message = await self.bot.send_pin(pin, ctx.channel)
             pin.last_message = new_message.id
             pin.last_message_dt = datetime.now(UTC)
             pin.active = True
+            self.scheduler.disarm(channel_id)
             if ctx.interaction is not None:
                 _ = await ctx.reply("re-activated pin!", ephemeral=True)
             await self.bot.log_pin_change(ctx, "Restarted Pin", pin)
@@ -157,6 +268,7 @@ class PinCog(commands.Cog, name="Pin"):
             pin.speed = speed
             if speed_type is not None:
                 pin.speed_type = speed_type
+            self.scheduler.disarm(channel_id)
             _ = await ctx.reply(f"Set #{ctx.channel.name} pin to {speed} {pin.speed_type}", ephemeral=True)  # pyright: ignore[reportUnknownMemberType, reportAttributeAccessIssue]
             await self.bot.log_pin_change(ctx, f"Changed speed to {speed} {pin.speed_type}", pin)
 
@@ -164,24 +276,23 @@ class PinCog(commands.Cog, name="Pin"):
     @commands.check(check_permitted)
     async def get_all_pins(self, ctx: commands.Context[PinformationBot]):
         """
-        Get a listing of all active pins in all channels
+        Get a listing of all active pins in this server
         """
-        if not self.bot.pins:
-            _ = await ctx.reply("No active pins!", ephemeral=True)
+        if ctx.guild is None:
+            _ = await ctx.reply("Pins can only be listed in a server.", ephemeral=True)
             return
-        embed = discord.Embed(
-            title="All Pins",
-            type="rich",
-            color=self.bot.config.embed_color or 14517504,
+        pins = sorted(
+            (pin for pin in self.bot.pins.for_guild(ctx.guild.id) if pin.active), key=lambda pin: pin.channel_id
         )
-        for channel_id, pin_obj in self.bot.pins.items():
-            # FUTURE: embed max field is 25. What if there are more than 25 pins?
-            _ = embed.add_field(
-                name=f"{self.bot.get_channel(channel_id).mention}",  # pyright: ignore [reportAttributeAccessIssue, reportOptionalMemberAccess, reportUnknownMemberType]
-                value=pin_obj.get_self_data(),
-                inline=False,
-            )
-        _ = await ctx.reply(embed=embed, ephemeral=True)
+        if not pins:
+            _ = await ctx.reply("No active pins!", ephemeral=True)
+            return
+        pages = pin_list_pages(pins, "All Pins", self.bot.config.embed_color or 14517504)
+        if len(pages) == 1:
+            _ = await ctx.reply(embed=pages[0], ephemeral=True)
+            return
+        view = EmbedPages(pages, ctx.author.id)
+        view.message = await ctx.reply(embed=pages[0], view=view, ephemeral=True)
 
     @commands.hybrid_command(name="pinhelp")
     async def pin_help(self, ctx: commands.Context[PinformationBot]):
@@ -197,67 +308,91 @@ class PinCog(commands.Cog, name="Pin"):
 
         _ = await ctx.reply(embed=embed, ephemeral=True)
 
-    async def _handle_counter(self, pin: PinUnion, message: discord.Message) -> None:
-        message_id = message.channel.id
-        if ChannelLock.is_locked(message.channel.id):
-            log.debug(f"Lock was already acquired in channel with ID: {message_id}. Skipping.")
+    def _handle_counter(self, channel: discord.abc.Messageable, count: int) -> bool:
+        """Fold `count` new messages into the channel's pin and report whether a repost is due. Never awaits."""
+        pin = self.bot.pins.get(channel.id)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownArgumentType]
+        if pin is None or not pin.active:
+            return False
+        self.messages_counted += count
+        match pin.speed_type:
+            case SpeedTypes.messages:
+                return count_messages(pin, count)
+            case SpeedTypes.seconds:
+                if count and not self.scheduler.is_armed(pin.channel_id):
+                    self.scheduler.arm(pin.channel_id, seconds_until_due(pin, datetime.now(UTC)))
+                return False
+
+    def _on_deadline(self, channel_id: int) -> None:
+        if (channel := self.bot.get_channel(channel_id)) is not None:
+            self.actors.post_deadline(channel)  # pyright: ignore[reportArgumentType]
+
+    async def _repost(self, channel: discord.abc.Messageable) -> None:
+        channel_id: int = channel.id  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        if not await ChannelLock.try_acquire(channel_id, REPOST_LOCK_WAIT):
+            # a command is busy with this pin (and will send a fresh one). The next message retries the repost
+            log.debug(f"Lock in channel {channel_id} is held. Skipping repost.")
             return
-        async with ChannelLock(message.channel.id):
-            match pin.speed_type:
-                case SpeedTypes.messages:
-                    pin.increment_msg_count()
-                    if pin.msg_count >= pin.speed:
-                        pin.msg_count = 0
-                        await self._update_pin_message(message)
-                case SpeedTypes.seconds:
-                    last_dt = pin.last_message_dt
-                    channel_name = message.channel.name  # pyright: ignore[reportUnknownMemberType, reportAttributeAccessIssue, reportUnknownVariableType]
-
-                    if not last_dt and pin.last_message:
-                        try:
-                            log.debug(f"Pin in {channel_name} didn't have last_message_dt stored. ")
-                            found_msg = await message.channel.fetch_message(pin.last_message)
-                            last_dt = found_msg.created_at
-                        except discord.NotFound:
-                            log.warning("Failed to get last message from server.")
-                    if not last_dt:
-                        log.warning(f"Time-based pin in {channel_name} missing last_dt")
-                        return
-
-                    delta: datetime = last_dt + timedelta(seconds=pin.speed)
-                    if delta <= datetime.now(tz=UTC):
-                        await self._update_pin_message(message)
-                    else:
-                        log.debug(f"Time not yet elapsed in ${channel_name}. Next update: {delta.isoformat()}")
-
-    async def _update_pin_message(self, message: discord.Message):
-        channel_name = getattr(message.channel, "name", f"Channel {message.channel.id}")
         try:
-            pin_data = self.bot.pins[message.channel.id]
-            channel = message.channel
+            pin = self.bot.pins.get(channel_id)
+            if pin is None or not pin.active:
+                return
+            if pin.speed_type == SpeedTypes.messages and (folded := pin.state.msg_count // max(pin.speed, 1) - 1) > 0:
+                # the actor folded several due reposts into this one
+                self.bot.governor.drop(channel_id, folded)
+            pin.state.msg_count = 0
+            if pin.last_message is not None and self.latest.latest(channel) == pin.last_message:
+                # nothing visible landed below the pin (deleted messages etc.), so leave it where it is
+                self.reposts_skipped += 1
+                log.debug(f"Pin in channel {pin.channel_id} is already the newest message. Skipping repost.")
+            else:
+                await self._update_pin_message(channel)
+            self.scheduler.disarm(pin.channel_id)
+        finally:
+            ChannelLock.release(channel_id)
+
+    def _repost_wanted(self, channel: discord.abc.Messageable, pin: PinUnion, old_message_id: int | None) -> bool:
+        """Whether a repost that was waiting on the governor still needs sending."""
+        if not pin.active or pin.last_message != old_message_id:
+            return False  # stopped, or something else reposted the pin meanwhile
+        return old_message_id is None or self.latest.latest(channel) != old_message_id
+
+    async def _update_pin_message(self, channel: discord.abc.Messageable):
+        channel_name = getattr(channel, "name", f"Channel {channel.id}")  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        try:
+            pin_data = self.bot.pins[channel.id]  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownArgumentType]
 
             old_message_id = pin_data.last_message
 
-            send_coro: Coroutine[None, None, Message] = pin_data.send_to(channel)
+            if not await self.bot.governor.acquire_send(
+                pin_data.channel_id, lambda: self._repost_wanted(channel, pin_data, old_message_id)
+            ):
+                return
+            started = perf_counter()
+            send_coro: Coroutine[None, None, int] = pin_data.send_payload(channel)
             if (
                 old_message_id
                 and pin_data.active
                 and isinstance(channel, (discord.TextChannel, discord.VoiceChannel, discord.Thread))
             ):
                 old_msg_partial: PartialMessage = channel.get_partial_message(old_message_id)
-                delete_coro: Coroutine[None, None, None] = old_msg_partial.delete()
+                delete_coro: Coroutine[None, None, None] = self.bot.delete_pin_message(old_msg_partial)
 
                 res_send, res_delete = await gather(send_coro, delete_coro, return_exceptions=True)
-                if isinstance(res_delete, BaseException):
-                    log.warning(f"Failed to delete old message concurrently: {res_delete}")
+                if isinstance(res_delete, BaseException) and not isinstance(res_delete, discord.NotFound):
+                    log.warning(f"Failed to delete old message concurrently, queueing a retry: {res_delete}")
+                    self.bot.deletions.submit(pin_data, old_message_id)
             else:
                 res_send = await send_coro
 
             if isinstance(res_send, BaseException):
                 raise res_send
+            self.reposts_sent += 1
+            if self.repost_latency is not None:
+                self.repost_latency.observe(perf_counter() - started)
 
-            pin_data.last_message = res_send.id
+            pin_data.last_message = res_send
             pin_data.last_message_dt = datetime.now(UTC)
+            self.latest.seen(pin_data.channel_id, res_send)
 
             _ = create_task(self._db_update(pin_data))
         except Exception:
@@ -266,37 +401,66 @@ class PinCog(commands.Cog, name="Pin"):
     async def _db_update(self, pin: PinUnion) -> None:
         self.bot.database.add_or_update_pin(pin)
 
-    async def _restart_single_pin(self, pin: PinUnion) -> None:
+    async def _restart_single_pin(self, pin: PinUnion) -> RestoreOutcome:
         try:
-            channel = cast(TextChannel, await self.bot.fetch_channel(pin.channel_id))
-
-            if pin.last_message:
-                try:
-                    last_bot_msg = await channel.fetch_message(pin.last_message)
-                    log.info(
-                        f"Last Message found for channel {channel.name} with ID {last_bot_msg.id}. Deleting old pin..."
-                    )
-                    await last_bot_msg.delete()
-                except discord.NotFound:
-                    log.warning(f"Old pin message {pin.last_message} not found in {channel.name}.")
-
-            new_msg = await pin.send_to(channel)
+            channel = self.bot.get_channel(pin.channel_id) or await self.bot.fetch_channel(pin.channel_id)
+        except discord.NotFound, discord.Forbidden:
+            log.warning(f"Channel {pin.channel_id} for persisted pin is gone or inaccessible. Skipping.")
+            return "skipped"
+        except Exception:
+            log.exception(f"Failed to look up channel {pin.channel_id}:")
+            return "failed"
+        if not isinstance(channel, (discord.TextChannel, discord.VoiceChannel, discord.Thread)):
+            log.warning(f"Channel {pin.channel_id} for persisted pin can't hold messages. Skipping.")
+            return "skipped"
+
+        try:
+            # pins saved before guild ids were stored get theirs here, before the outbox row is keyed on it
+            pin.guild_id = channel.guild.id
+            # the old pin is deleted in the background, so restores don't wait on it
+            self.bot.deletions.submit(pin, pin.last_message)
+            new_msg = await self.bot.send_pin(pin, channel)
             pin.last_message = new_msg.id
             pin.last_message_dt = datetime.now(UTC)
 
-            self.bot.pins[pin.channel_id] = pin
+            self.bot.pins.add(pin)
             await self._db_update(pin)
-
         except Exception:
             log.exception(f"Failed to restart pin in channel {pin.channel_id}:")
+            return "failed"
+        return "restored"
 
     async def _restart_active_pins(self, pin_list: list[PinUnion]) -> None:
-        """Restores cached pins from DB models concurrently on bot startup."""
+        """Restores cached pins from DB models on bot startup, a bounded number at a time."""
         if not pin_list:
             return
 
-        tasks: list[Task[None]] = [create_task(self._restart_single_pin(pin)) for pin in pin_list]
-        _ = await gather(*tasks, return_exceptions=True)
+        started = perf_counter()
+        limit = Semaphore(max(self.bot.config.restore_concurrency, 1))
+        progress: Counter[RestoreOutcome] = Counter()
+        log_every = max(len(pin_list) // 10, 1)
+
+        async def restore(pin: PinUnion) -> None:
+            async with limit:
+                progress[await self._restart_single_pin(pin)] += 1
+            if (done := progress.total()) % log_every == 0 and done < len(pin_list):
+                log.info(f"Restoring pins: {done}/{len(pin_list)} ({perf_counter() - started:.1f}s)")
+
+        _ = await gather(*(restore(pin) for pin in pin_list))
+        log.info(
+            f"Restored {progress['restored']}/{len(pin_list)} pins in {perf_counter() - started:.1f}s "
+            + f"({progress['failed']} failed, {progress['skipped']} skipped)"
+        )
+
+    def _stop_pin(self, channel: discord.abc.Messageable, pin: PinUnion) -> None:
+        """Deactivate a pin and delete its message. Callers hold the channel lock and remove the pin from the DB."""
+        self.bot.deletions.submit(pin, pin.last_message)
+        pin.active = False
+        pin.last_message = None
+        self.actors.stop(pin.channel_id)
+        self.scheduler.disarm(pin.channel_id)
+        self.latest.forget(pin.channel_id)
+        self.bot.governor.forget(pin.channel_id)
 
     async def _create_text_pin(
         self,
@@ -305,16 +469,19 @@ class PinCog(commands.Cog, name="Pin"):
         text: str,
         speed: int = 1,
         speed_type: SpeedTypes = SpeedTypes.messages,
+        save: bool = True,
     ) -> TextPin:
         if existing_pin := self.bot.pins.get(channel_id):
-            _ = create_task(delete_old_message(channel, existing_pin.last_message))
+            self.bot.deletions.submit(existing_pin, existing_pin.last_message)
+        self.scheduler.disarm(channel_id)
 
-        pin = TextPin(channel_id=channel_id, text=text, speed=speed, speed_type=speed_type)
-        self.bot.pins[channel_id] = pin
-        message = await channel.send(pin.text)
+        pin = TextPin(channel_id=channel_id, guild_id=_guild_id(channel), text=text, speed=speed, speed_type=speed_type)
+        self.bot.pins.add(pin)
+        message = await self.bot.send_pin(pin, channel)
         pin.last_message = message.id
         pin.last_message_dt = datetime.now(UTC)
-        self.bot.database.add_or_update_pin(pin)
+        if save:
+            self.bot.database.add_or_update_pin(pin)
         return pin
 
     async def _create_embed_pin(
@@ -328,12 +495,15 @@ class PinCog(commands.Cog, name="Pin"):
         color: int | None = None,
         speed: int = 1,
         speed_type: SpeedTypes = SpeedTypes.messages,
+        save: bool = True,
     ):
         if existing_pin := self.bot.pins.get(channel_id):
-            _ = create_task(delete_old_message(channel, existing_pin.last_message))
+            self.bot.deletions.submit(existing_pin, existing_pin.last_message)
+        self.scheduler.disarm(channel_id)
 
         pin = EmbedPin(
             channel_id=channel_id,
+            guild_id=_guild_id(channel),
             title=title,
             text=text,
             url=url,
@@ -342,13 +512,19 @@ class PinCog(commands.Cog, name="Pin"):
             speed=speed,
             speed_type=speed_type,
         )
-        self.bot.pins[channel_id] = pin
-        message = await channel.send(embed=pin.embed)
+        self.bot.pins.add(pin)
+        message = await self.bot.send_pin(pin, channel)
         pin.last_message = message.id
         pin.last_message_dt = datetime.now(UTC)
-        self.bot.database.add_or_update_pin(pin)
+        if save:
+            self.bot.database.add_or_update_pin(pin)
         return pin
 
 
+def _guild_id(channel: discord.abc.Messageable) -> int | None:
+    guild: discord.Guild | None = getattr(channel, "guild", None)
+    return guild.id if guild is not None else None
+
+
 async def setup(bot: PinformationBot):
     await bot.add_cog(PinCog(bot))
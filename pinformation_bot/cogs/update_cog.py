@@ -1,4 +1,3 @@
-from asyncio import create_task
 from datetime import UTC, datetime
 
 from discord.ext import commands
@@ -6,7 +5,7 @@ from discord.ext import commands
 from ..pinformation import PinformationBot
 from ..pins import EmbedPin, PinUnion
 from ..utils.channel_lock import ChannelLock
-from ..utils.utils import check_permitted, delete_old_message, get_pin, handle_reply
+from ..utils.utils import check_permitted, get_pin, handle_reply
 
 
 class UpdateCog(commands.Cog):
@@ -69,12 +68,10 @@ class UpdateCog(commands.Cog):
 
             if require_embed and not await self._is_embed(ctx, pin):
                 return
-            _ = create_task(delete_old_message(ctx.message.channel, pin.last_message))
-            setattr(pin, attribute_name, value)
-            if isinstance(pin, EmbedPin):
-                pin.rebuild_embed()
+            self.bot.deletions.submit(pin, pin.last_message)
+            pin.update_content(attribute_name, value)
 
-            message = await pin.send_to(channel)
+            message = await self.bot.send_pin(pin, channel)
 
             pin.last_message = message.id
             pin.last_message_dt = datetime.now(UTC)
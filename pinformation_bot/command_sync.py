@@ -0,0 +1,44 @@
+import json
+import logging
+from hashlib import sha256
+from pathlib import Path
+from typing import Any
+
+from discord import app_commands
+
+from .bot_config import write_text_atomic
+
+log = logging.getLogger(__name__)
+
+SYNC_CACHE_NAME = "command_sync.json"  # kept next to the pin database
+
+
+def tree_fingerprint(tree: app_commands.CommandTree[Any]) -> str:
+    """
+    A stable hash of the global app command payloads the tree would sync. Commands are sorted by name and
+    payload keys by name, so it only changes when what Discord would be sent changes.
+    """
+    payloads = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda payload: payload["name"])
+    return sha256(json.dumps(payloads, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def read_synced_fingerprint(path: Path, application_id: int | None) -> str | None:
+    """The fingerprint last synced for this application, or None if there isn't a usable one on disk."""
+    try:
+        cached: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except OSError, ValueError:
+        log.warning(f"Ignoring unreadable command sync cache {path}")
+        return None
+    if not isinstance(cached, dict) or cached.get("application_id") != application_id:
+        return None
+    fingerprint = cached.get("fingerprint")
+    return fingerprint if isinstance(fingerprint, str) else None
+
+
+def write_synced_fingerprint(path: Path, application_id: int | None, fingerprint: str) -> None:
+    try:
+        _ = write_text_atomic(path, json.dumps({"application_id": application_id, "fingerprint": fingerprint}))
+    except OSError:
+        log.exception(f"Failed to write command sync cache {path}:")
@@ -0,0 +1,134 @@
+import logging
+from asyncio import Event, Task, create_task, sleep, timeout, to_thread
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import ValidationError
+
+from .bot_config import JSON_FILE, BotConfig, write_text_atomic
+
+if TYPE_CHECKING:
+    from .pinformation import PinformationBot
+
+log = logging.getLogger(__name__)
+
+
+class ConfigStore:
+    """
+    Persists the bot's config and picks up edits made to the file while the bot is running.
+    Changes from management commands are written once `write_delay` seconds have passed without another change,
+    through a temp file and rename in a worker thread. A failed write keeps the config marked as changed and is retried
+    with backoff, up to `write_attempts` times per round. Every `poll_interval` seconds the file's mtime is checked,
+    and a changed file is validated and hot-swapped into the bot. A poll interval of 0 disables watching.
+    """
+
+    def __init__(
+        self,
+        bot: PinformationBot,
+        path: Path = JSON_FILE,
+        write_delay: float = 1.0,
+        poll_interval: float = 5.0,
+        write_attempts: int = 5,
+    ) -> None:
+        self.bot: PinformationBot = bot
+        self.path: Path = path
+        self.write_delay: float = write_delay
+        self.poll_interval: float = poll_interval
+        self.write_attempts: int = write_attempts
+        self._mtime_ns: int | None = None  # mtime of the version of the file the bot last read or wrote
+        self._dirty: bool = False
+        self._writes: int = 0  # bumped as each write starts, so the watcher can tell one happened while it looked
+        self._flush_now: Event = Event()
+        self._writer: Task[None] | None = None
+        self._watcher: Task[None] | None = None
+
+    async def start(self) -> None:
+        self._mtime_ns = await to_thread(self._stat_mtime)
+        if self.poll_interval > 0:
+            self._watcher = create_task(self._watch(), name="config-watcher")
+
+    async def stop(self) -> None:
+        """Stop watching the file and write out any pending change."""
+        if self._watcher is not None:
+            _ = self._watcher.cancel()
+            self._watcher = None
+        await self.flush()
+
+    def schedule_write(self) -> None:
+        """Mark the config as changed. Bursts of changes are coalesced into a single write."""
+        self._dirty = True
+        if self._writer is None or self._writer.done():
+            self._flush_now.clear()
+            self._writer = create_task(self._write_soon(), name="config-writer")
+
+    async def flush(self) -> None:
+        """Write any pending change now instead of waiting out the write delay."""
+        if self._dirty and (self._writer is None or self._writer.done()):
+            self.schedule_write()  # a change left over from a round of failed writes
+        if self._writer is not None and not self._writer.done():
+            self._flush_now.set()
+            await self._writer
+
+    async def _write_soon(self) -> None:
+        with suppress(TimeoutError):
+            async with timeout(self.write_delay):
+                _ = await self._flush_now.wait()
+        failures = 0
+        while self._dirty:
+            self._dirty = False
+            self._writes += 1
+            # serialise on the loop so the snapshot can't interleave with a command changing the config
+            text = self.bot.config.model_dump_json(indent=4)
+            try:
+                # the new mtime is recorded before the watcher runs again, so it never mistakes this write for an edit
+                self._mtime_ns = await to_thread(write_text_atomic, self.path, text)
+            except OSError:
+                self._dirty = True
+                failures += 1
+                if failures >= self.write_attempts:
+                    log.exception(f"Failed to write config to {self.path}, will try again on the next change:")
+                    return
+                log.warning(f"Failed to write config to {self.path}, retrying")
+                with suppress(TimeoutError):
+                    async with timeout(self.write_delay * 2**failures):
+                        _ = await self._flush_now.wait()
+                continue
+            log.debug(f"Wrote config to {self.path}")
+
+    def _stat_mtime(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    async def _watch(self) -> None:
+        while True:
+            await sleep(self.poll_interval)
+            try:
+                await self.check_for_changes()
+            except Exception:
+                log.exception(f"Failed to reload config from {self.path}:")
+
+    def _writing(self) -> bool:
+        return self._dirty or (self._writer is not None and not self._writer.done())
+
+    async def check_for_changes(self) -> None:
+        # our own pending or in-flight write would look like an external edit
+        if self._writing():
+            return
+        writes = self._writes
+        mtime_ns = await to_thread(self._stat_mtime)
+        if mtime_ns is None or mtime_ns == self._mtime_ns:
+            return
+        try:
+            config = await to_thread(BotConfig.load_from_json, self.path)
+        except (OSError, ValidationError) as e:
+            self._mtime_ns = mtime_ns
+            log.warning(f"Ignoring change to {self.path}, keeping the current config: {e}")
+            return
+        if self._writing() or writes != self._writes:
+            return  # the bot wrote the file while it was being read, so what was read is ours or already stale
+        self._mtime_ns = mtime_ns
+        log.info(f"{self.path.name} changed on disk, reloading config")
+        await self.bot.apply_config(config)
@@ -1,52 +1,273 @@
+import logging
 import sqlite3
+import threading
+from collections.abc import Callable, Iterable
+from contextlib import closing
 from pathlib import Path
 from sqlite3.dbapi2 import Cursor
+from time import monotonic, perf_counter, time
 from types import TracebackType
-from typing import Self
+from typing import Any, Self, override
 
 from pinformation_bot.pins import PinModel, PinUnion
 
 from .bot_config import CONFIG_FOLDER
 
+log = logging.getLogger(__name__)
+DB_FILE = Path(CONFIG_FOLDER / "pin_cache.db")
+
+UPSERT_PIN_QUERY: str = """
+    INSERT OR REPLACE INTO pins (
+        channel_id, guild_id, pin_type, speed, speed_type, last_message, last_message_dt,
+        msg_count, active, text, title, url, image, color
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# the columns of UPSERT_PIN_QUERY, in the order of PinModel.to_db_tuple()
+PIN_COLUMNS: tuple[str, ...] = (
+    "channel_id",
+    "guild_id",
+    "pin_type",
+    "speed",
+    "speed_type",
+    "last_message",
+    "last_message_dt",
+    "msg_count",
+    "active",
+    "text",
+    "title",
+    "url",
+    "image",
+    "color",
+)
+DELETE_PIN_QUERY: str = "DELETE FROM pins WHERE channel_id = ?"
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    """v1: the original untyped pins table, plus the cluster lease tables."""
+    _ = conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pins(
+        channel_id TEXT PRIMARY KEY,pin_type STRING,speed INTEGER,
+        speed_type TEXT,last_message TEXT,active INTEGER,
+        text TEXT,title TEXT,url TEXT,image TEXT,color INTEGER)
+        """
+    )
+    _ = conn.execute("CREATE TABLE IF NOT EXISTS cluster_workers(owner TEXT PRIMARY KEY, expires REAL NOT NULL)")
+    _ = conn.execute(
+        "CREATE TABLE IF NOT EXISTS pin_leases(partition INTEGER PRIMARY KEY, owner TEXT NOT NULL, "
+        + "expires REAL NOT NULL)"
+    )
+
+
+def _type_pin_columns(conn: sqlite3.Connection) -> None:
+    """v2: INTEGER ids, a guild_id column with an index, and the pin's hot state."""
+    _ = conn.execute(
+        """
+        CREATE TABLE pins_v2(
+        channel_id INTEGER PRIMARY KEY,guild_id INTEGER,pin_type TEXT NOT NULL,
+        speed INTEGER NOT NULL DEFAULT 1,speed_type TEXT NOT NULL DEFAULT 'messages',
+        last_message INTEGER,last_message_dt REAL,msg_count INTEGER NOT NULL DEFAULT 0,
+        active INTEGER NOT NULL DEFAULT 1,text TEXT,title TEXT,url TEXT,image TEXT,color INTEGER)
+        """
+    )
+    _ = conn.execute(
+        """
+        INSERT INTO pins_v2 (
+            channel_id, pin_type, speed, speed_type, last_message, active, text, title, url, image, color
+        )
+        SELECT CAST(channel_id AS INTEGER), pin_type, COALESCE(speed, 1), COALESCE(speed_type, 'messages'),
+               CAST(last_message AS INTEGER), COALESCE(active, 1), text, title, url, image, color
+        FROM pins
+        """
+    )
+    _ = conn.execute("DROP TABLE pins")
+    _ = conn.execute("ALTER TABLE pins_v2 RENAME TO pins")
+    _ = conn.execute("CREATE INDEX pins_guild_id ON pins(guild_id)")
+
+
+def _create_delete_outbox(conn: sqlite3.Connection) -> None:
+    """v3: old pin messages still waiting to be deleted, so deletes cut short by a restart are finished after it."""
+    _ = conn.execute(
+        """
+        CREATE TABLE delete_outbox(
+        message_id INTEGER PRIMARY KEY,channel_id INTEGER NOT NULL,attempts INTEGER NOT NULL DEFAULT 0)
+        """
+    )
+
+
+def _add_outbox_guild(conn: sqlite3.Connection) -> None:
+    """v4: the guild of each queued delete, so cluster workers only pick up deletes for guilds they own."""
+    _ = conn.execute("ALTER TABLE delete_outbox ADD COLUMN guild_id INTEGER")
+
+
+# schema migrations in order. The database's PRAGMA user_version is the number of migrations applied to it.
+MIGRATIONS: tuple[Callable[[sqlite3.Connection], None], ...] = (
+    _create_base_tables,
+    _type_pin_columns,
+    _create_delete_outbox,
+    _add_outbox_guild,
+)
+
+
+def connect(file_path: Path, timeout: float = 5.0) -> sqlite3.Connection:
+    """
+    Open a connection to the pin database. WAL lets the writer thread and lease heartbeats commit without blocking
+    readers, and with WAL, synchronous=NORMAL only syncs on checkpoints while still never corrupting the database.
+    """
+    conn = sqlite3.connect(file_path, timeout=timeout)
+    _ = conn.execute("PRAGMA journal_mode = WAL")
+    _ = conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    version: int = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > len(MIGRATIONS):
+        raise RuntimeError(f"Pin database schema v{version} is newer than this bot supports (v{len(MIGRATIONS)}).")
+    return version
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """
+    Bring the schema up to date, applying each pending migration in its own transaction.
+    Cluster workers can start at the same time, so the version is read again once the write lock is held and a
+    migration another process already applied is skipped.
+    """
+    version = _schema_version(conn)
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        _ = conn.execute("BEGIN IMMEDIATE")
+        try:
+            if _schema_version(conn) >= target:
+                conn.rollback()
+                continue
+            log.info(f"Migrating pin database schema to v{target}")
+            migration(conn)
+            _ = conn.execute(f"PRAGMA user_version = {target}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
 
 class Database:
-    def __init__(self):
-        self.file_path: Path = Path(CONFIG_FOLDER / "pin_cache.db")
-        self.db: sqlite3.Connection = sqlite3.connect(self.file_path)
+    def __init__(self, file_path: Path = DB_FILE):
+        self.file_path: Path = file_path
+        self.db: sqlite3.Connection = connect(self.file_path)
         self.db.row_factory = sqlite3.Row
         self.cur: Cursor = self.db.cursor()
-        self._init_db()
-
-    def _init_db(self) -> None:
-        query: str = """
-            CREATE TABLE IF NOT EXISTS pins(
-            channel_id TEXT PRIMARY KEY,pin_type STRING,speed INTEGER,
-            speed_type TEXT,last_message TEXT,active INTEGER,
-            text TEXT,title TEXT,url TEXT,image TEXT,color INTEGER)
-            """
-        with self.db:
-            _ = self.cur.execute(query)
+        self.commit_count: int = 0
+        self.last_commit_latency: float = 0.0
+        self.total_commit_latency: float = 0.0
+        migrate(self.db)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of pin writes waiting to be committed. Always 0 for the synchronous database."""
+        return 0
+
+    @property
+    def avg_commit_latency(self) -> float:
+        return self.total_commit_latency / self.commit_count if self.commit_count else 0.0
+
+    def _record_commit(self, started: float) -> None:
+        elapsed = perf_counter() - started
+        self.commit_count += 1
+        self.last_commit_latency = elapsed
+        self.total_commit_latency += elapsed
 
     def add_or_update_pin(self, pin: PinUnion) -> None:
-        query: str = """
-            INSERT OR REPLACE INTO pins (
-                channel_id, pin_type, speed, speed_type, last_message, 
-                active, text, title, url, image, color
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        started = perf_counter()
+        with self.db:
+            _ = self.cur.execute(UPSERT_PIN_QUERY, pin.to_db_tuple())
+        self._record_commit(started)
+
+    def save_pins(self, pins: Iterable[PinUnion]) -> None:
+        """Write the current state of many pins in one transaction, e.g. to keep their hot state across a restart."""
+        started = perf_counter()
         with self.db:
-            _ = self.cur.execute(query, pin.to_db_tuple())
+            _ = self.cur.executemany(UPSERT_PIN_QUERY, [pin.to_db_tuple() for pin in pins])
+        self._record_commit(started)
 
     def remove_pin(self, channel_id: int) -> None:
-        query = "DELETE FROM pins WHERE channel_id = ?"
+        started = perf_counter()
         with self.db:
-            _ = self.cur.execute(query, (channel_id,))
+            _ = self.cur.execute(DELETE_PIN_QUERY, (channel_id,))
+        self._record_commit(started)
+
+    def remove_pins(self, channel_ids: Iterable[int]) -> None:
+        """Delete many pins in one transaction."""
+        started = perf_counter()
+        with self.db:
+            _ = self.cur.executemany(DELETE_PIN_QUERY, [(channel_id,) for channel_id in channel_ids])
+        self._record_commit(started)
 
     def get_persisted_pins(self) -> list[PinUnion]:
         query: str = "SELECT * FROM pins WHERE active = 1"
         rows: list[Cursor] = self.cur.execute(query).fetchall()
         return [PinModel.from_db_row(dict(row)) for row in rows]
 
+    def flush(self) -> None:
+        """Block until every queued write is committed. Writes are never queued here, so this is a no-op."""
+
+    def update_delete_outbox(
+        self, queued: Iterable[tuple[int, int, int | None]], retried: Iterable[int], finished: Iterable[int]
+    ) -> None:
+        """
+        Apply a round of delete outbox changes in one transaction: add (channel_id, message_id, guild_id) rows, count
+        a failed attempt for each retried message id and remove the finished ones.
+        Opens its own connection so it can be called from a worker thread.
+        """
+        with closing(connect(self.file_path)) as conn, conn:
+            _ = conn.executemany(
+                "INSERT OR IGNORE INTO delete_outbox (channel_id, message_id, guild_id) VALUES (?, ?, ?)", list(queued)
+            )
+            _ = conn.executemany(
+                "UPDATE delete_outbox SET attempts = attempts + 1 WHERE message_id = ?",
+                [(message_id,) for message_id in retried],
+            )
+            _ = conn.executemany(
+                "DELETE FROM delete_outbox WHERE message_id = ?", [(message_id,) for message_id in finished]
+            )
+
+    def get_pending_deletes(self) -> list[tuple[int, int, int | None, int]]:
+        """Every (channel_id, message_id, guild_id, attempts) row in the delete outbox."""
+        rows: list[sqlite3.Row] = self.cur.execute(
+            "SELECT channel_id, message_id, guild_id, attempts FROM delete_outbox"
+        ).fetchall()
+        return [(row[0], row[1], row[2], row[3]) for row in rows]
+
+    def claim_partitions(self, owner: str, partitions: int, ttl: float) -> set[int]:
+        """
+        Heartbeat `owner` and renew its partition leases, then claim free or expired partitions up to its fair
+        share of the live workers, releasing any above it. Returns the partitions `owner` holds afterwards.
+        Opens its own connection so it can be called from a worker thread.
+        """
+        now = time()
+        with closing(connect(self.file_path, timeout=ttl / 3)) as conn, conn:
+            _ = conn.execute("BEGIN IMMEDIATE")
+            _ = conn.execute("INSERT OR REPLACE INTO cluster_workers VALUES (?, ?)", (owner, now + ttl))
+            _ = conn.execute("DELETE FROM cluster_workers WHERE expires <= ?", (now,))
+            live_workers: int = conn.execute("SELECT COUNT(*) FROM cluster_workers").fetchone()[0]
+            fair_share = -(-partitions // live_workers)
+
+            _ = conn.execute("UPDATE pin_leases SET expires = ? WHERE owner = ?", (now + ttl, owner))
+            owned = sorted(row[0] for row in conn.execute("SELECT partition FROM pin_leases WHERE owner = ?", (owner,)))
+            if surplus := owned[fair_share:]:
+                _ = conn.executemany("DELETE FROM pin_leases WHERE partition = ?", [(p,) for p in surplus])
+                owned = owned[:fair_share]
+
+            taken = {row[0] for row in conn.execute("SELECT partition FROM pin_leases WHERE expires > ?", (now,))}
+            free = [p for p in range(partitions) if p not in taken][: max(fair_share - len(owned), 0)]
+            _ = conn.executemany(
+                "INSERT OR REPLACE INTO pin_leases VALUES (?, ?, ?)", [(p, owner, now + ttl) for p in free]
+            )
+            return {*owned, *free}
+
+    def release_partitions(self, owner: str) -> None:
+        with closing(connect(self.file_path)) as conn, conn:
+            _ = conn.execute("DELETE FROM pin_leases WHERE owner = ?", (owner,))
+            _ = conn.execute("DELETE FROM cluster_workers WHERE owner = ?", (owner,))
+
     def close(self) -> None:
         self.db.close()
 
@@ -54,4 +275,157 @@ class Database:
         return self
 
     def __exit__(self, exc_type: type[BaseException], exc_value: BaseException, traceback: TracebackType) -> None:
-        self.close()
\ No newline at end of file
+        self.close()
+
+
+class WriteBehindDatabase(Database):
+    """
+    Database that hands pin writes to a dedicated writer thread instead of committing on the event loop.
+    Repeated writes for the same channel are coalesced so only the latest state is committed, and each
+    batch is written with executemany in a single transaction once the flush interval has passed.
+    A batch that fails to commit (e.g. another cluster worker holding the database lock) goes back in the queue,
+    under any newer writes for the same channels, and is retried with backoff. Reads of the pins table go through the
+    connection owned by the calling thread, with the queued writes laid over them.
+    """
+
+    def __init__(
+        self,
+        file_path: Path = DB_FILE,
+        flush_interval: float = 0.25,
+        retry_backoff: float = 0.5,
+        max_retry_backoff: float = 30.0,
+        close_attempts: int = 5,
+    ):
+        super().__init__(file_path)
+        self.flush_interval: float = flush_interval
+        self.retry_backoff: float = retry_backoff
+        self.max_retry_backoff: float = max_retry_backoff
+        self.close_attempts: int = close_attempts  # commit attempts left to a failing batch once the bot is closing
+        self.failed_commits: int = 0
+        self._pending: dict[int, tuple[Any, ...] | None] = {}  # channel_id -> row to upsert, None to delete
+        self._in_flight: dict[int, tuple[Any, ...] | None] = {}  # the batch the writer is committing
+        self._flush_requested: bool = False
+        self._closed: bool = False
+        self._cond: threading.Condition = threading.Condition()
+        self._writer: threading.Thread = threading.Thread(target=self._run, name="pin-db-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    @override
+    def queue_depth(self) -> int:
+        return len(self._pending) + len(self._in_flight)
+
+    @override
+    def add_or_update_pin(self, pin: PinUnion) -> None:
+        self._enqueue(pin.channel_id, pin.to_db_tuple())
+
+    @override
+    def save_pins(self, pins: Iterable[PinUnion]) -> None:
+        for pin in pins:
+            self._enqueue(pin.channel_id, pin.to_db_tuple())
+
+    @override
+    def remove_pin(self, channel_id: int) -> None:
+        self._enqueue(channel_id, None)
+
+    @override
+    def remove_pins(self, channel_ids: Iterable[int]) -> None:
+        for channel_id in channel_ids:
+            self._enqueue(channel_id, None)
+
+    @override
+    def get_persisted_pins(self) -> list[PinUnion]:
+        """The active pins as they will be once the queued writes are committed, without waiting for them."""
+        with self._cond:
+            queued = {**self._in_flight, **self._pending}
+        # WAL reads see the in-flight batch either fully committed or not at all, and the overlay covers both
+        pins = {pin.channel_id: pin for pin in super().get_persisted_pins() if pin.channel_id not in queued}
+        for channel_id, row in queued.items():
+            if row is not None and (values := dict(zip(PIN_COLUMNS, row, strict=True)))["active"]:
+                pins[channel_id] = PinModel.from_db_row(values)
+        return list(pins.values())
+
+    def _enqueue(self, channel_id: int, row: tuple[Any, ...] | None) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Database writer is closed.")
+            was_empty = not self._pending
+            self._pending[channel_id] = row
+            if was_empty:
+                self._cond.notify_all()
+
+    @override
+    def flush(self) -> None:
+        with self._cond:
+            if not self._writer.is_alive():
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            _ = self._cond.wait_for(lambda: not self._pending and not self._in_flight or not self._writer.is_alive())
+
+    @override
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        super().close()
+
+    def _run(self) -> None:
+        conn = connect(self.file_path)
+        failures = 0
+        try:
+            while batch := self._next_batch():
+                committed = self._commit_batch(conn, batch)
+                with self._cond:
+                    self._in_flight = {}
+                    failures = 0 if committed else failures + 1
+                    if not committed:
+                        self._requeue(batch, failures)
+                    self._cond.notify_all()
+        finally:
+            conn.close()
+
+    def _requeue(self, batch: dict[int, tuple[Any, ...] | None], failures: int) -> None:
+        """Put a failed batch back under any newer writes and wait out the backoff. Called holding the lock."""
+        if self._closed and failures >= self.close_attempts:
+            log.error(f"Giving up on {len(batch)} pin writes after {failures} failed commits while closing")
+            return
+        for channel_id, row in batch.items():
+            _ = self._pending.setdefault(channel_id, row)
+        deadline = monotonic() + min(self.retry_backoff * 2 ** (failures - 1), self.max_retry_backoff)
+        while (remaining := deadline - monotonic()) > 0:
+            _ = self._cond.wait(remaining)
+
+    def _next_batch(self) -> dict[int, tuple[Any, ...] | None]:
+        """Wait for pending writes, hold them for the flush interval, then take the whole batch."""
+        with self._cond:
+            _ = self._cond.wait_for(lambda: self._pending or self._closed)
+            deadline = monotonic() + self.flush_interval
+            while not (self._flush_requested or self._closed) and (remaining := deadline - monotonic()) > 0:
+                _ = self._cond.wait(remaining)
+            batch, self._pending = self._pending, {}
+            self._in_flight = batch
+            self._flush_requested = False
+            return batch
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: dict[int, tuple[Any, ...] | None]) -> bool:
+        upserts = [row for row in batch.values() if row is not None]
+        deletes = [(channel_id,) for channel_id, row in batch.items() if row is None]
+        started = perf_counter()
+        try:
+            with conn:
+                if upserts:
+                    _ = conn.executemany(UPSERT_PIN_QUERY, upserts)
+                if deletes:
+                    _ = conn.executemany(DELETE_PIN_QUERY, deletes)
+        except sqlite3.Error:
+            log.exception(f"Failed to commit {len(batch)} queued pin writes, will retry:")
+            self.failed_commits += 1
+            return False
+        self._record_commit(started)
+        log.debug(
+            f"Committed {len(batch)} pin writes in {self.last_commit_latency * 1000:.2f}ms "
+            + f"({len(self._pending)} queued)"
+        )
+        return True
@@ -0,0 +1,215 @@
+import logging
+import random
+from asyncio import Event, Task, create_task, gather, sleep, timeout, to_thread
+from collections.abc import Callable
+from contextlib import suppress
+from datetime import timedelta
+from itertools import islice
+from time import monotonic
+from typing import TYPE_CHECKING
+
+import discord
+
+if TYPE_CHECKING:
+    from .pinformation import PinformationBot
+    from .pins import PinUnion
+
+log = logging.getLogger(__name__)
+
+BULK_DELETE_LIMIT = 100  # ids per bulk delete call, Discord's limit
+# Discord only bulk deletes messages younger than 14 days. The margin covers clock skew and time spent queued
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=10)
+
+
+class _ChannelDeletes:
+    __slots__ = ("attempts", "guild_id", "not_before")
+
+    def __init__(self, guild_id: int | None) -> None:
+        self.guild_id: int | None = guild_id
+        self.attempts: dict[int, int] = {}  # message_id -> failed attempts so far
+        self.not_before: float = 0.0  # monotonic time the channel's next attempt waits for after a failure
+
+
+class DeletionService:
+    """
+    Deletes old pin messages in the background. Deletes are written to the database's delete outbox before they're
+    attempted, so ones cut short by a crash or restart are finished on the next start. Outbox changes are collected
+    and written off the event loop in one transaction per round, so submitting never waits on the database.
+    Pending deletes are batched per channel into bulk delete calls of up to 100 messages, with single deletes for
+    messages too old to bulk delete. Failed deletes are retried with exponential backoff, and given up on after
+    `max_attempts`. In cluster mode only deletes for guilds this worker owns are picked up from the outbox.
+    """
+
+    def __init__(
+        self,
+        bot: PinformationBot,
+        batch_delay: float = 1.0,
+        max_attempts: int = 8,
+        backoff: float = 2.0,
+        max_backoff: float = 300.0,
+    ) -> None:
+        self.bot: PinformationBot = bot
+        self.batch_delay: float = batch_delay
+        self.max_attempts: int = max_attempts
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.deleted: int = 0
+        self.retried: int = 0
+        self.abandoned: int = 0
+        self._channels: dict[int, _ChannelDeletes] = {}
+        # outbox changes not written yet
+        self._queued: list[tuple[int, int, int | None]] = []
+        self._retried: list[int] = []
+        self._finished: list[int] = []
+        self._wakeup: Event = Event()
+        self._task: Task[None] | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(channel.attempts) for channel in self._channels.values())
+
+    def start(self) -> None:
+        self.load(self.bot.owns_guild)
+        if self._task is None or self._task.done():
+            self._task = create_task(self._run(), name="deletion-service")
+
+    def stop(self) -> None:
+        """Stop deleting. Whatever is still pending stays in the outbox for the next start."""
+        if self._task is not None:
+            _ = self._task.cancel()
+            self._task = None
+        if changes := self._take_changes():
+            try:
+                self.bot.database.update_delete_outbox(*changes)
+            except Exception:
+                log.exception("Failed to write the delete outbox while stopping:")
+
+    def load(self, owns_guild: Callable[[int | None], bool]) -> None:
+        """Pick up deletes from the outbox for the guilds `owns_guild` accepts, e.g. after taking over partitions."""
+        loaded = 0
+        for channel_id, message_id, guild_id, attempts in self.bot.database.get_pending_deletes():
+            if not owns_guild(guild_id):
+                continue
+            queue = self._channels.setdefault(channel_id, _ChannelDeletes(guild_id))
+            if message_id not in queue.attempts:
+                queue.attempts[message_id] = attempts
+                loaded += 1
+        if loaded:
+            log.info(f"Resuming {loaded} pin message deletes from the outbox")
+            self._wakeup.set()
+
+    def drop(self, owns_guild: Callable[[int | None], bool]) -> None:
+        """Forget pending deletes for the guilds `owns_guild` accepts. They stay in the outbox for their new owner."""
+        for channel_id in [channel_id for channel_id, queue in self._channels.items() if owns_guild(queue.guild_id)]:
+            del self._channels[channel_id]
+
+    def submit(self, pin: PinUnion, message_id: int | None) -> None:
+        """Queue an old message of `pin` for deletion. It's written to the outbox before it's attempted."""
+        if not message_id:
+            return
+        guild_id = self.bot.pin_guild_id(pin)
+        queue = self._channels.setdefault(pin.channel_id, _ChannelDeletes(guild_id))
+        if message_id not in queue.attempts:
+            queue.attempts[message_id] = 0
+            self._queued.append((pin.channel_id, message_id, guild_id))
+        self._wakeup.set()
+
+    def _take_changes(self) -> tuple[list[tuple[int, int, int | None]], list[int], list[int]] | None:
+        if not (self._queued or self._retried or self._finished):
+            return None
+        changes = self._queued, self._retried, self._finished
+        self._queued, self._retried, self._finished = [], [], []
+        return changes
+
+    async def _persist(self) -> None:
+        if (changes := self._take_changes()) is None:
+            return
+        try:
+            await to_thread(self.bot.database.update_delete_outbox, *changes)
+        except Exception:
+            log.exception("Failed to write the delete outbox, will retry:")
+            queued, retried, finished = changes
+            self._queued[:0], self._retried[:0], self._finished[:0] = queued, retried, finished
+            raise
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # written before the deletes they cover are attempted
+                await self._persist()
+            except Exception:
+                await sleep(self.backoff)
+                continue
+            now = monotonic()
+            if due := [channel_id for channel_id, queue in self._channels.items() if queue.not_before <= now]:
+                _ = await gather(*(self._delete_due(channel_id) for channel_id in due))
+                continue
+            self._wakeup.clear()
+            next_due = min((queue.not_before for queue in self._channels.values()), default=None)
+            with suppress(TimeoutError):
+                async with timeout(None if next_due is None else next_due - now):
+                    _ = await self._wakeup.wait()
+            if self._wakeup.is_set():
+                # deletes tend to come in bursts (bulk commands, several edits), give them a chance to share a call
+                await sleep(self.batch_delay)
+
+    async def _delete_due(self, channel_id: int) -> None:
+        try:
+            await self._delete_batch(channel_id)
+        except Exception:
+            log.exception(f"Failed to process pending deletes in {channel_id}:")
+            if (queue := self._channels.get(channel_id)) is not None:
+                queue.not_before = monotonic() + self.max_backoff
+
+    async def _delete_batch(self, channel_id: int) -> None:
+        if (queue := self._channels.get(channel_id)) is None:
+            return  # dropped, another worker owns the channel now
+        unsaved = {message_id for _, message_id, _ in self._queued}  # wait for the outbox write
+        batch = list(
+            islice((message_id for message_id in queue.attempts if message_id not in unsaved), BULK_DELETE_LIMIT)
+        )
+        cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - BULK_DELETE_MAX_AGE)
+        recent = [message_id for message_id in batch if message_id > cutoff]
+        requests = [recent] if len(recent) > 1 else [[message_id] for message_id in recent]
+        requests += [[message_id] for message_id in batch if message_id <= cutoff]
+
+        done: list[int] = []
+        failed: list[int] = []
+        for message_ids in requests:
+            try:
+                await self.bot.governor.acquire_delete(channel_id)
+                if len(message_ids) > 1:
+                    await self.bot.http.delete_messages(channel_id, message_ids)
+                else:
+                    await self.bot.http.delete_message(channel_id, message_ids[0])
+                self.deleted += len(message_ids)
+            except discord.NotFound:
+                pass  # already deleted, or the channel is gone
+            except discord.Forbidden:
+                log.warning(f"Missing permissions to delete {len(message_ids)} old pin messages in {channel_id}")
+                self.abandoned += len(message_ids)
+            except discord.HTTPException, OSError:
+                log.warning(f"Failed to delete {len(message_ids)} old pin messages in {channel_id}, will retry")
+                failed += message_ids
+                continue
+            done += message_ids
+
+        for message_id in failed:
+            queue.attempts[message_id] += 1
+            if queue.attempts[message_id] >= self.max_attempts:
+                log.warning(f"Giving up on deleting message {message_id} in {channel_id}")
+                self.abandoned += 1
+                done.append(message_id)
+        retry = [message_id for message_id in failed if message_id not in done]
+        for message_id in done:
+            del queue.attempts[message_id]
+
+        self._finished += done
+        if retry:
+            self.retried += len(retry)
+            self._retried += retry
+            attempts = max(queue.attempts[message_id] for message_id in retry)
+            delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+            queue.not_before = monotonic() + delay * random.uniform(0.5, 1.0)  # noqa: S311
+        if not queue.attempts and self._channels.get(channel_id) is queue:
+            del self._channels[channel_id]
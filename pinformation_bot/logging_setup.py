@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import sys
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, override
+
+from .bot_config import BotConfig
+
+log = logging.getLogger(__name__)
+
+# attributes every LogRecord has. Anything else on a record was passed through `extra=` and is emitted as a field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, None, None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra=` fields of the record alongside the standard ones."""
+
+    @override
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if task_name := getattr(record, "taskName", None):
+            entry["task"] = task_name
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Rate limits DEBUG records per call site: at most `burst` records from the same line every `interval` seconds.
+    The first record let through after a window with drops carries a `suppressed` count of what was dropped.
+    Keeps per-message debug lines (like discord.py's event dispatch logging) from flooding the log under load.
+    """
+
+    def __init__(self, burst: int = 5, interval: float = 10.0) -> None:
+        super().__init__()
+        self.burst: int = burst
+        self.interval: float = interval
+        self._windows: dict[tuple[str, int], list[float]] = {}  # call site -> [window start, passed, suppressed]
+
+    @override
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.pathname, record.lineno)
+        window = self._windows.get(key)
+        if window is None or record.created - window[0] >= self.interval:
+            if window is not None and window[2]:
+                record.suppressed = int(window[2])
+            self._windows[key] = [record.created, 1, 0]
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class LoopSafeQueueHandler(QueueHandler):
+    """
+    Queues records for the listener thread after only resolving the message and any exception text,
+    leaving the actual formatting and I/O to the listener.
+    """
+
+    @override
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(config: BotConfig) -> QueueListener:
+    """
+    Route every log record through a queue to a listener thread that formats and writes it, so handlers never block
+    the event loop. The level comes from the LOG_LEVEL environment variable, falling back to the config's log_level.
+    An unknown level logs a warning and uses INFO.
+    Returns the started listener, which should be stopped on exit to flush what's left in the queue.
+    """
+    level = (os.environ.get("LOG_LEVEL") or config.log_level).upper()
+    known_level = level in logging.getLevelNamesMapping()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(
+        JsonFormatter()
+        if config.log_format == "json"
+        else logging.Formatter("%(asctime)s %(levelname)-8s %(name)s %(message)s")
+    )
+
+    log_queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    queue_handler = LoopSafeQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler())
+
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level if known_level else logging.INFO)
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    if not known_level:
+        log.warning(f"Unknown log level {level!r}, using INFO.")
+    return listener
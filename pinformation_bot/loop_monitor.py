@@ -0,0 +1,98 @@
+import logging
+import sys
+import threading
+import traceback
+from asyncio import Task, create_task, sleep
+from collections import deque
+from time import monotonic
+
+log = logging.getLogger(__name__)
+
+
+class SlowCallback:
+    """Where the event loop was stuck during a stall, captured by the watchdog thread."""
+
+    __slots__ = ("captured_at", "duration", "stack")
+
+    def __init__(self, captured_at: float, stack: list[str]) -> None:
+        self.captured_at: float = captured_at
+        self.duration: float | None = None  # filled in once the loop gets going again
+        self.stack: list[str] = stack
+
+    @property
+    def location(self) -> str:
+        return self.stack[-1] if self.stack else "unknown"
+
+
+class LoopMonitor:
+    """
+    Samples event loop lag: a task sleeps for `interval` and records how late it woke up. The last `window`
+    samples are kept for percentiles. With a `slow_callback_threshold`, a watchdog thread also grabs the loop
+    thread's stack whenever the sampler hasn't run for that long, which points at the callback blocking the loop.
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 600, slow_callback_threshold: float | None = None) -> None:
+        self.interval: float = interval
+        self.slow_callback_threshold: float | None = slow_callback_threshold
+        self.samples: deque[float] = deque(maxlen=window)
+        self.max_lag: float = 0.0
+        self.slow_callbacks: deque[SlowCallback] = deque(maxlen=20)
+        self._last_tick: float = monotonic()
+        self._pending: SlowCallback | None = None
+        self._loop_thread_id: int = 0
+        self._task: Task[None] | None = None
+        self._stop: threading.Event = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    @property
+    def current_lag(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    def lag_percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = monotonic()
+        self._task = create_task(self._sample(), name="loop-lag-monitor")
+        if self.slow_callback_threshold is not None:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            self._stop.set()
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = monotonic() + self.interval
+            await sleep(self.interval)
+            self._last_tick = now = monotonic()
+            lag = max(now - expected, 0.0)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if (stall := self._pending) is not None:
+                self._pending = None
+                stall.duration = lag
+                self.slow_callbacks.append(stall)
+                log.warning(f"Event loop blocked for {lag * 1000:.0f}ms in {stall.location}")
+
+    def _watch(self) -> None:
+        threshold: float = self.slow_callback_threshold  # pyright: ignore[reportAssignmentType]
+        while not self._stop.wait(threshold / 2):
+            # the sampler wakes up every `interval`, so anything past that plus the threshold is a stall
+            if self._pending is not None or monotonic() - self._last_tick < self.interval + threshold:
+                continue
+            if (frame := sys._current_frames().get(self._loop_thread_id)) is None:  # pyright: ignore[reportPrivateUsage]
+                continue
+            stack = [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in traceback.extract_stack(frame)]
+            self._pending = SlowCallback(monotonic(), stack[-8:])
@@ -0,0 +1,180 @@
+import logging
+from asyncio import StreamReader, StreamWriter, start_server, timeout
+from asyncio.base_events import Server
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .cogs.pin_cog import PinCog
+    from .pinformation import PinformationBot
+
+log = logging.getLogger(__name__)
+
+REPOST_LATENCY_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram. Observing is a bisect and three increments, so it's fine on hot paths."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Iterable[float]) -> None:
+        self.bounds: tuple[float, ...] = tuple(sorted(bounds))
+        self.counts: list[int] = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Exposition:
+    """Builds a Prometheus text format (v0.0.4) exposition."""
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels: str) -> None:
+        label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+        self.lines.append(f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}")
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram) -> None:
+        self.metric(name, "histogram", help_text)
+        cumulative = 0
+        bounds = [*(str(bound) for bound in histogram.bounds), "+Inf"]
+        for bound, count in zip(bounds, histogram.counts, strict=True):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, le=bound)
+        self.sample(f"{name}_sum", histogram.sum)
+        self.sample(f"{name}_count", histogram.count)
+
+    def render(self) -> bytes:
+        return ("\n".join(self.lines) + "\n").encode()
+
+
+class MetricsServer:
+    """
+    Serves the pin engine's counters at `http://<host>:<port>/metrics` in Prometheus text format.
+    Nothing is collected per event on the server's behalf: the counters it reports are the plain ints the
+    bot keeps anyway, and they are only read and formatted when the endpoint is scraped.
+    """
+
+    def __init__(self, bot: PinformationBot, host: str, port: int) -> None:
+        self.bot: PinformationBot = bot
+        self.host: str = host
+        self.port: int = port
+        self._server: Server | None = None
+
+    async def start(self) -> None:
+        self._server = await start_server(self._handle, self.host, self.port)
+        log.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        try:
+            async with timeout(5):
+                request_line = await reader.readline()
+                while await reader.readline() not in (b"\r\n", b"\n", b""):
+                    pass  # headers are not needed
+            method, path, *_version = request_line.decode("latin-1").split()
+            if method != "GET" or path.split("?")[0] != "/metrics":
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+            else:
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.render()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except TimeoutError, ValueError, ConnectionError:
+            pass
+        except Exception:
+            log.exception("Failed to serve metrics request:")
+        finally:
+            writer.close()
+
+    def render(self) -> bytes:
+        # imported here as the utils package imports the bot module, which imports this one
+        from .utils.channel_lock import ChannelLock
+
+        bot = self.bot
+        out = _Exposition()
+
+        out.metric("pinformation_active_pins", "gauge", "Active pins tracked by this process, per guild.")
+        active: dict[str, int] = {}
+        for pin in bot.pins.values():
+            if pin.active:
+                guild = str(pin.guild_id) if pin.guild_id is not None else "none"
+                active[guild] = active.get(guild, 0) + 1
+        for guild, count in active.items():
+            out.sample("pinformation_active_pins", count, guild=guild)
+
+        pin_cog: PinCog | None = bot.get_cog("Pin")  # pyright: ignore[reportAssignmentType]
+        if pin_cog is not None:
+            out.metric("pinformation_messages_counted_total", "counter", "Messages counted towards active pins.")
+            out.sample("pinformation_messages_counted_total", pin_cog.messages_counted)
+            out.metric("pinformation_reposts_sent_total", "counter", "Pins reposted to the bottom of their channel.")
+            out.sample("pinformation_reposts_sent_total", pin_cog.reposts_sent)
+            out.metric(
+                "pinformation_reposts_skipped_total", "counter", "Due reposts skipped as the pin was still the newest."
+            )
+            out.sample("pinformation_reposts_skipped_total", pin_cog.reposts_skipped)
+            if pin_cog.repost_latency is not None:
+                out.histogram(
+                    "pinformation_repost_latency_seconds",
+                    "Time to send a repost and delete the previous one.",
+                    pin_cog.repost_latency,
+                )
+
+        locks = ChannelLock.manager
+        out.metric("pinformation_channel_lock_contended_total", "counter", "Lock acquisitions that had to wait.")
+        out.sample("pinformation_channel_lock_contended_total", locks.contended)
+        out.metric("pinformation_channel_lock_timeouts_total", "counter", "Lock try-acquires that gave up waiting.")
+        out.sample("pinformation_channel_lock_timeouts_total", locks.timeouts)
+        out.metric("pinformation_channel_locks", "gauge", "Channel locks currently kept.")
+        out.sample("pinformation_channel_locks", len(locks))
+        out.metric("pinformation_sends_superseded_total", "counter", "Due reposts dropped or folded into a newer one.")
+        out.sample("pinformation_sends_superseded_total", bot.governor.dropped)
+        out.metric("pinformation_sends_throttled_total", "counter", "Sends and deletes delayed by the rate governor.")
+        out.sample("pinformation_sends_throttled_total", bot.governor.throttled)
+
+        out.metric("pinformation_audit_dropped_total", "counter", "Audit log entries dropped on a full queue.")
+        out.sample("pinformation_audit_dropped_total", bot.audit.dropped)
+
+        deletions = bot.deletions
+        out.metric("pinformation_pending_deletes", "gauge", "Old pin messages waiting to be deleted.")
+        out.sample("pinformation_pending_deletes", deletions.queue_depth)
+        out.metric("pinformation_deletes_total", "counter", "Old pin messages deleted.")
+        out.sample("pinformation_deletes_total", deletions.deleted)
+        out.metric("pinformation_delete_retries_total", "counter", "Failed old pin message deletes queued for retry.")
+        out.sample("pinformation_delete_retries_total", deletions.retried)
+        out.metric("pinformation_deletes_abandoned_total", "counter", "Old pin message deletes given up on.")
+        out.sample("pinformation_deletes_abandoned_total", deletions.abandoned)
+
+        database = bot.database
+        out.metric("pinformation_db_commit_latency_seconds", "summary", "Pin database commit latency.")
+        out.sample("pinformation_db_commit_latency_seconds_sum", database.total_commit_latency)
+        out.sample("pinformation_db_commit_latency_seconds_count", database.commit_count)
+        out.metric("pinformation_db_queue_depth", "gauge", "Pin writes waiting to be committed.")
+        out.sample("pinformation_db_queue_depth", database.queue_depth)
+
+        out.metric("pinformation_gateway_latency_seconds", "gauge", "Gateway heartbeat latency, per shard.")
+        latencies = getattr(bot, "latencies", None) or [(bot.shard_id or 0, bot.latency)]
+        for shard_id, latency in latencies:
+            if latency == latency:  # NaN until the first heartbeat is acknowledged
+                out.sample("pinformation_gateway_latency_seconds", latency, shard=str(shard_id))
+
+        return out.render()
@@ -0,0 +1,61 @@
+import logging
+from collections.abc import Iterable
+from typing import Self
+
+from .bot_config import BotConfig
+
+log = logging.getLogger(__name__)
+
+
+def _snowflakes(ids: Iterable[str], source: str) -> frozenset[int]:
+    parsed: set[int] = set()
+    for raw_id in ids:
+        try:
+            parsed.add(int(raw_id))
+        except ValueError:
+            log.warning(f"Ignoring invalid id {raw_id!r} in {source}")
+    return frozenset(parsed)
+
+
+class PermissionIndex:
+    """
+    The permission lists from BotConfig, parsed into int-keyed sets so command checks don't scan the config.
+    The config keeps ids as strings for JSON, so the index has to be rebuilt whenever those lists change.
+    """
+
+    __slots__ = ("admin_users", "admin_roles", "role_channels")
+
+    def __init__(
+        self, admin_users: frozenset[int], admin_roles: frozenset[int], role_channels: dict[int, frozenset[int]]
+    ) -> None:
+        self.admin_users: frozenset[int] = admin_users
+        self.admin_roles: frozenset[int] = admin_roles
+        self.role_channels: dict[int, frozenset[int]] = role_channels  # role_id -> permitted channel ids
+
+    @classmethod
+    def from_config(cls, config: BotConfig) -> Self:
+        role_channels = {
+            role_id: channels
+            for raw_role_id, raw_channels in config.permitted_roles.items()
+            for role_id in _snowflakes((raw_role_id,), "permitted_roles")
+            if (channels := _snowflakes(raw_channels, f"permitted_roles[{raw_role_id}]"))
+        }
+        return cls(
+            _snowflakes(config.admin_users, "admin_users"),
+            _snowflakes(config.admin_roles, "admin_roles"),
+            role_channels,
+        )
+
+    def is_admin(self, user_id: int, role_ids: Iterable[int]) -> bool:
+        return user_id in self.admin_users or not self.admin_roles.isdisjoint(role_ids)
+
+    def is_permitted(self, user_id: int, role_ids: Iterable[int], channel_id: int) -> bool:
+        """Whether the user is an admin, or has a role that is permitted in `channel_id`."""
+        if user_id in self.admin_users:
+            return True
+        for role_id in role_ids:
+            if role_id in self.admin_roles:
+                return True
+            if (channels := self.role_channels.get(role_id)) is not None and channel_id in channels:
+                return True
+        return False
@@ -0,0 +1,62 @@
+from collections.abc import Iterator, Mapping
+from typing import override
+
+from .pins import PinUnion
+
+
+class PinRegistry(Mapping[int, PinUnion]):
+    """
+    Every pin the bot is tracking, keyed by channel id, with a secondary index of the pins in each guild.
+    Guilds belong to exactly one shard, so the guild index is also how a shard finds the pins it owns.
+    """
+
+    def __init__(self) -> None:
+        self._pins: dict[int, PinUnion] = {}
+        self._guilds: dict[int, set[int]] = {}  # guild_id -> channel ids
+
+    @override
+    def __getitem__(self, channel_id: int) -> PinUnion:
+        return self._pins[channel_id]
+
+    @override
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._pins)
+
+    @override
+    def __len__(self) -> int:
+        return len(self._pins)
+
+    @override
+    def __contains__(self, channel_id: object) -> bool:
+        return channel_id in self._pins
+
+    def add(self, pin: PinUnion) -> None:
+        if (old := self._pins.get(pin.channel_id)) is not None and old.guild_id != pin.guild_id:
+            self._unindex(old)
+        self._pins[pin.channel_id] = pin
+        if pin.guild_id is not None:
+            self._guilds.setdefault(pin.guild_id, set()).add(pin.channel_id)
+
+    def remove(self, channel_id: int) -> PinUnion | None:
+        if (pin := self._pins.pop(channel_id, None)) is not None:
+            self._unindex(pin)
+        return pin
+
+    def _unindex(self, pin: PinUnion) -> None:
+        if pin.guild_id is None or (channels := self._guilds.get(pin.guild_id)) is None:
+            return
+        channels.discard(pin.channel_id)
+        if not channels:
+            del self._guilds[pin.guild_id]
+
+    def for_guild(self, guild_id: int) -> list[PinUnion]:
+        return [self._pins[channel_id] for channel_id in self._guilds.get(guild_id, ())]
+
+    def for_shard(self, shard_id: int, shard_count: int) -> list[PinUnion]:
+        """Pins in guilds routed to `shard_id`, using Discord's `(guild_id >> 22) % shard_count` sharding formula."""
+        return [
+            pin
+            for guild_id in self._guilds
+            if (guild_id >> 22) % shard_count == shard_id
+            for pin in self.for_guild(guild_id)
+        ]
@@ -1,38 +1,175 @@
 import logging
 from asyncio import sleep
+from collections import Counter
+from collections.abc import Callable
 from datetime import UTC, datetime
 from json import dumps
-from typing import override
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import Any, override
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
+from .audit_sink import AuditSink
 from .bot_config import BotConfig
-from .db_funcs import Database
+from .cluster import ClusterCoordinator, default_worker_id
+from .command_sync import SYNC_CACHE_NAME, read_synced_fingerprint, tree_fingerprint, write_synced_fingerprint
+from .config_store import ConfigStore
+from .db_funcs import DB_FILE, Database, WriteBehindDatabase
+from .deletion_service import DeletionService
+from .loop_monitor import LoopMonitor
+from .metrics import MetricsServer
+from .permissions import PermissionIndex
+from .pin_registry import PinRegistry
 from .pins import EmbedPin, PinUnion
+from .send_governor import SendGovernor
 
 log = logging.getLogger(__name__)
-log.setLevel(logging.DEBUG)
-discord.utils.setup_logging()
-discord.utils.setup_logging(level=logging.DEBUG, root=False)
 
 INTENTS = discord.Intents.default()
 INTENTS.message_content = True  # noqa
 
+# the lean gateway profile only subscribes to what pins and prefix commands need, and keeps no message or member cache.
+# Guild messages that can't be commands are dispatched as `lean_message` instead of `on_message`, so other cogs'
+# on_message listeners only see commands, mentions and DMs under it
+LEAN_INTENTS = discord.Intents(guilds=True, guild_messages=True, dm_messages=True, message_content=True)
+LEAN_OPTIONS: dict[str, Any] = {
+    "max_messages": None,
+    "member_cache_flags": discord.MemberCacheFlags.none(),
+    "chunk_guilds_at_startup": False,
+}
+
+
+# settings that are only read while the bot starts up, so editing them needs a restart
+RESTART_ONLY_SETTINGS: tuple[str, ...] = (
+    "cogs",
+    "debug",
+    "db_write_behind",
+    "db_flush_interval",
+    "min_repost_interval",
+    "rate_global_limit",
+    "rate_global_per",
+    "rate_channel_sends",
+    "rate_channel_send_per",
+    "rate_channel_deletes",
+    "rate_channel_delete_per",
+    "sharded",
+    "shard_count",
+    "cluster",
+    "cluster_partitions",
+    "cluster_lease_ttl",
+    "cluster_worker_id",
+    "gateway_profile",
+    "config_write_delay",
+    "config_poll_interval",
+    "metrics_host",
+    "metrics_port",
+    "loop_lag_interval",
+    "slow_callback_threshold",
+    "log_level",
+    "log_format",
+)
+
 
 class PinformationBot(commands.Bot):
-    def __init__(self, config: BotConfig):
+    def __init__(self, config: BotConfig, database_file: Path = DB_FILE, **options: Any):
+        lean = config.gateway_profile == "lean"
+        if lean:
+            options = LEAN_OPTIONS | options
         super().__init__(
-            intents=INTENTS,
+            intents=LEAN_INTENTS if lean else INTENTS,
+            tree_cls=PinformationTree,
             command_prefix=commands.when_mentioned_or(config.prefix),
             activity=discord.Activity(type=discord.ActivityType.playing, name="Keeping up with chat."),
             allowed_mentions=discord.AllowedMentions(everyone=False),
+            **options,
         )
 
         self.config: BotConfig = config
-        self.database: Database = Database()
-        self.pins: dict[int, PinUnion] = {}
+        self.permissions: PermissionIndex = PermissionIndex.from_config(config)
+        self.config_store: ConfigStore = ConfigStore(
+            self, write_delay=config.config_write_delay, poll_interval=config.config_poll_interval
+        )
+        self.database: Database = (
+            WriteBehindDatabase(database_file, flush_interval=config.db_flush_interval)
+            if config.db_write_behind
+            else Database(database_file)
+        )
+        self.command_sync_file: Path = database_file.with_name(SYNC_CACHE_NAME)
+        self.pins: PinRegistry = PinRegistry()
+        self.governor: SendGovernor = SendGovernor(
+            global_limit=config.rate_global_limit,
+            global_per=config.rate_global_per,
+            channel_sends=config.rate_channel_sends,
+            channel_send_per=config.rate_channel_send_per,
+            channel_deletes=config.rate_channel_deletes,
+            channel_delete_per=config.rate_channel_delete_per,
+        )
         self.log_channel: discord.TextChannel | None = None
+        self.audit: AuditSink = AuditSink(self)
+        self.deletions: DeletionService = DeletionService(self)
+        self.cluster: ClusterCoordinator | None = None
+        if config.cluster:
+            self.cluster = ClusterCoordinator(
+                self,
+                config.cluster_worker_id or default_worker_id(),
+                config.cluster_partitions,
+                config.cluster_lease_ttl,
+            )
+
+        self.started_at: float = monotonic()
+        self.loop_monitor: LoopMonitor = LoopMonitor(
+            config.loop_lag_interval, slow_callback_threshold=config.slow_callback_threshold
+        )
+        self.metrics: MetricsServer | None = None
+        if config.metrics_port is not None:
+            self.metrics = MetricsServer(self, config.metrics_host, config.metrics_port)
+
+        self.lean_gateway: bool = lean
+        if lean:
+            # ws._discord_parsers is this same dict, so swapping the entry reroutes live gateway events
+            parsers = self._connection.parsers
+            self._parse_message_create: Callable[[dict[str, Any]], None] = parsers["MESSAGE_CREATE"]
+            parsers["MESSAGE_CREATE"] = self._parse_lean_message_create
+
+    def _parse_lean_message_create(self, data: dict[str, Any]) -> None:
+        """
+        MESSAGE_CREATE handler for the lean gateway profile. DMs and anything that could be a command still go through
+        discord.py's parser. Every other message only bumps its channel's `last_message_id`, and messages in pinned
+        channels are handed to the pin cog as a `lean_message` event, without ever building a Message object.
+        Those messages never reach `on_message` listeners.
+        """
+        content: str = data.get("content", "")
+        if "guild_id" not in data or content.startswith((self.config.prefix, "<@")):
+            self._parse_message_create(data)
+            return
+
+        channel, _guild = self._connection._get_guild_channel(data)  # pyright: ignore[reportPrivateUsage, reportArgumentType]
+        message_id = int(data["id"])
+        if hasattr(channel, "last_message_id"):
+            channel.last_message_id = message_id  # pyright: ignore[reportAttributeAccessIssue]
+        if channel.id in self.pins:
+            self.dispatch("lean_message", channel, message_id, data["author"].get("bot", False))
+
+    def save_config(self) -> None:
+        """Rebuild the permission index after a config change and queue the config to be written to disk."""
+        self.permissions = PermissionIndex.from_config(self.config)
+        self.config_store.schedule_write()
+
+    async def apply_config(self, config: BotConfig) -> None:
+        """
+        Hot-swap a config that was edited on disk. Settings in RESTART_ONLY_SETTINGS are only read at startup,
+        so changes to them are logged and take effect on the next restart.
+        """
+        old, self.config = self.config, config
+        self.permissions = PermissionIndex.from_config(config)
+        self.command_prefix = commands.when_mentioned_or(config.prefix)
+        if changed := [name for name in RESTART_ONLY_SETTINGS if getattr(old, name) != getattr(config, name)]:
+            log.warning(f"Config settings {', '.join(changed)} changed on disk and will apply after a restart.")
+        if config.log_channel != old.log_channel:
+            await self.set_log_channel()
 
     async def set_log_channel(self) -> None:
         if self.config.log_channel:
@@ -43,20 +180,94 @@ class PinformationBot(commands.Bot):
         log.warning(f"Text channel with ID {self.config.log_channel} not found. Logging to console only.")
         self.log_channel = None
 
+    def pin_guild_id(self, pin: PinUnion) -> int | None:
+        if pin.guild_id is not None:
+            return pin.guild_id
+        guild: discord.Guild | None = getattr(self.get_channel(pin.channel_id), "guild", None)
+        return guild.id if guild is not None else None
+
+    def owns_guild(self, guild_id: int | None) -> bool:
+        """Whether this process is responsible for a guild. Always true outside cluster mode."""
+        return self.cluster is None or self.cluster.owns_guild(guild_id)
+
+    def owns_pin(self, pin: PinUnion) -> bool:
+        return self.cluster is None or self.cluster.owns_guild(self.pin_guild_id(pin))
+
+    @override
+    async def process_commands(self, message: discord.Message, /) -> None:
+        if self.owns_guild(message.guild.id if message.guild is not None else None):
+            await super().process_commands(message)
+
     @override
     async def setup_hook(self) -> None:
+        if self.cluster is not None:
+            await self.cluster.start()
+        self.loop_monitor.start()
+        await self.config_store.start()
+        self.deletions.start()
+        if self.metrics is not None:
+            await self.metrics.start()
+
+        phases: dict[str, float] = {}
+
         # add cogs
+        started = perf_counter()
         for cog in self.config.cogs:
             await self.load_extension(cog)
         if self.config.debug:
             log.debug("----- DEBUG MODE ENABLED -----")
             await self.load_extension("pinformation_bot.cogs.debug_cog")
+        phases["cog load"] = perf_counter() - started
 
+        started = perf_counter()
         await self.set_log_channel()
+        self.audit.start()
+        phases["log channel fetch"] = perf_counter() - started
+
+        started = perf_counter()
+        synced = await self.sync_commands()
+        phases["command sync" if synced is not None else "command sync (skipped)"] = perf_counter() - started
+
+        log.info("Setup finished: " + ", ".join(f"{phase} {elapsed:.2f}s" for phase, elapsed in phases.items()))
 
-        # sync all commands
+    @override
+    async def close(self) -> None:
+        await self.audit.stop()
+        self.deletions.stop()
+        await super().close()
+        self.loop_monitor.stop()
+        await self.config_store.stop()
+        if self.metrics is not None:
+            await self.metrics.stop()
+        # keep message counts and repost times across the restart, while this worker still holds its leases.
+        # Stopped pins stay in the registry for pinrestart but their rows are already gone, so don't bring them back
+        self.database.save_pins(pin for pin in self.pins.values() if pin.active)
+        if self.cluster is not None:
+            await self.cluster.stop()
+        self.database.close()
+
+    async def sync_commands(self, force: bool = False) -> int | None:
+        """
+        Sync the global app commands, unless they match what was last synced according to the fingerprint cached
+        next to the pin database. Returns the number of commands synced, or None if the sync was skipped.
+        """
+        fingerprint = tree_fingerprint(self.tree)
+        if not force and read_synced_fingerprint(self.command_sync_file, self.application_id) == fingerprint:
+            log.info(f"App commands unchanged since the last sync ({fingerprint[:12]}). Skipping sync.")
+            return None
         synced = await self.tree.sync()
-        log.info(f"Added main cog commands... Synced {len(synced)} commands")
+        write_synced_fingerprint(self.command_sync_file, self.application_id, fingerprint)
+        log.info(f"Synced {len(synced)} app commands ({fingerprint[:12]})")
+        return len(synced)
+
+    async def send_pin(self, pin: PinUnion, channel: discord.abc.Messageable) -> discord.Message:
+        """Send a pin once the governor allows it."""
+        _ = await self.governor.acquire_send(pin.channel_id)
+        return await pin.send_to(channel)
+
+    async def delete_pin_message(self, message: discord.PartialMessage) -> None:
+        await self.governor.acquire_delete(message.channel.id)
+        await message.delete()
 
     async def reload_extensions(self) -> list[str]:
         ext_count: int = len(self.extensions)
@@ -92,13 +303,73 @@ class PinformationBot(commands.Bot):
             if pin.text and len(pin.text) > max_len:
                 _ = embed.set_footer(text=f"Content truncated to {max_len} characters.")
 
-        _ = await self.log_channel.send(embed=embed)
+        _ = self.audit.submit(embed)
+
+    async def log_bulk_change(
+        self,
+        ctx: commands.Context[PinformationBot],
+        command_type: str,
+        changed: list[int],
+        failed: list[int],
+        pin: PinUnion | None = None,
+    ) -> None:
+        """One audit entry summarising a bulk command, instead of one per channel."""
+        summary = f"{command_type} in {len(changed)} channels" + (f", {len(failed)} failed" if failed else "")
+        if self.log_channel is None:
+            log.info(f"{summary}: {ctx.author.name}|{ctx.author.id}")
+            return
+        embed = discord.Embed(title=summary, timestamp=datetime.now(tz=UTC))
+        _ = embed.add_field(name="User", value=ctx.author.mention)
+        if pin is not None:
+            _ = embed.add_field(name="Pin Type", value=pin.pin_type)
+            content = dumps(pin.get_embed_info(), indent=2) if isinstance(pin, EmbedPin) else pin.text
+            _ = embed.add_field(name="Content", value=f"```\n{truncate(content or '', 999)}```", inline=False)
+        for name, channel_ids in (("Channels", changed), ("Failed", failed)):
+            if channel_ids:
+                mentions = " ".join(f"<#{channel_id}>" for channel_id in channel_ids)
+                _ = embed.add_field(name=name, value=truncate(mentions), inline=False)
+        _ = self.audit.submit(embed)
 
     @staticmethod
     def log_action(ctx: commands.Context[PinformationBot], message: str) -> None:
         log.info(f"{ctx.author.name}({ctx.author.id}): {message}")
 
 
+class PinformationTree(app_commands.CommandTree[PinformationBot]):
+    @override
+    async def interaction_check(self, interaction: discord.Interaction[PinformationBot], /) -> bool:
+        # in cluster mode every worker sees every interaction, but only the guild's owner may answer it
+        return self.client.owns_guild(interaction.guild_id)
+
+
+class ShardedPinformationBot(PinformationBot, commands.AutoShardedBot):
+    """
+    Opt-in sharded variant of the bot. Each shard owns the pins of its guilds: persisted pins are restored
+    shard by shard as each one becomes ready, and per-shard latency and message counts show up in /botinfo.
+    """
+
+    def __init__(self, config: BotConfig, database_file: Path = DB_FILE):
+        super().__init__(config, database_file, shard_count=config.shard_count)
+        self.shard_messages: Counter[int] = Counter()
+
+    @override
+    def _parse_lean_message_create(self, data: dict[str, Any]) -> None:
+        if (guild_id := data.get("guild_id")) is not None:
+            self.shard_messages[(int(guild_id) >> 22) % (self.shard_count or 1)] += 1
+        super()._parse_lean_message_create(data)
+
+    @override
+    async def on_message(self, message: discord.Message, /) -> None:
+        # under the lean profile every guild message was already counted by the raw parser
+        if message.guild is not None and not self.lean_gateway:
+            self.shard_messages[message.guild.shard_id] += 1
+        await super().on_message(message)
+
+
+def create_bot(config: BotConfig, database_file: Path = DB_FILE) -> PinformationBot:
+    return ShardedPinformationBot(config, database_file) if config.sharded else PinformationBot(config, database_file)
+
+
 def truncate(text: str, max_len: int = 1024) -> str:
     if len(text) > max_len:
         return text[: max_len - 3] + "..."
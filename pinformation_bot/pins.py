@@ -6,6 +6,11 @@ import discord
 from discord.embeds import Embed
 from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
 
+try:
+    from discord.http import MultipartParameters
+except ImportError:  # not public API. send_payload falls back to send_to without it
+    MultipartParameters = None
+
 
 class SpeedTypes(StrEnum):
     messages = "messages"
@@ -15,22 +20,69 @@ class SpeedTypes(StrEnum):
 type PinType = Literal["text", "embed", "messages"]
 
 
+class PinState:
+    """
+    Runtime-only hot state of a pin. It changes on every counted message, so it lives in a slotted
+    object instead of going through pydantic's validating __setattr__.
+    """
+
+    __slots__: tuple[str, ...] = ("msg_count", "last_message", "last_message_ts", "payload")
+
+    def __init__(self, msg_count: int = 0, last_message: int | None = None, last_message_ts: float | None = None):
+        self.msg_count: int = msg_count
+        self.last_message: int | None = last_message
+        self.last_message_ts: float | None = last_message_ts  # POSIX timestamp of last_message
+        self.payload: dict[str, Any] | None = None  # cached create message body, see message_payload
+
+
 class PinModel[T: PinType](BaseModel):
     model_config: ClassVar[ConfigDict] = ConfigDict(extra='forbid', arbitrary_types_allowed=True)
 
     channel_id: int
+    guild_id: int | None = None
     pin_type: T
     speed: int = 1
     speed_type: SpeedTypes = SpeedTypes.messages
-    msg_count: int = 0
-    last_message: int | None = None
-    last_message_dt: datetime | None = None
     started: float = Field(default_factory=lambda: datetime.now(UTC).timestamp())
     active: bool = True
-    message_obj: Any = None  # Not used in DB. Runtime only
+    state: PinState = Field(default_factory=PinState, exclude=True, repr=False)  # Not used in DB. Runtime only
+
+    content_fields: ClassVar[frozenset[str]] = frozenset()
+    hot_fields: ClassVar[frozenset[str]] = frozenset({"msg_count", "last_message", "last_message_dt"})
+
+    @override
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in self.content_fields:
+            self.state.payload = None
+
+    @property
+    def msg_count(self) -> int:
+        return self.state.msg_count
+
+    @msg_count.setter
+    def msg_count(self, value: int) -> None:
+        self.state.msg_count = value
+
+    @property
+    def last_message(self) -> int | None:
+        return self.state.last_message
+
+    @last_message.setter
+    def last_message(self, value: int | None) -> None:
+        self.state.last_message = value
+
+    @property
+    def last_message_dt(self) -> datetime | None:
+        ts = self.state.last_message_ts
+        return datetime.fromtimestamp(ts, UTC) if ts is not None else None
+
+    @last_message_dt.setter
+    def last_message_dt(self, value: datetime | None) -> None:
+        self.state.last_message_ts = value.timestamp() if value is not None else None
 
-    def increment_msg_count(self) -> None:
-        self.msg_count += 1
+    def increment_msg_count(self, count: int = 1) -> None:
+        self.state.msg_count += count
 
     def get_self_data(self) -> str:
         typ = "seconds" if self.speed_type == SpeedTypes.seconds else "messages"
@@ -44,29 +96,77 @@ class PinModel[T: PinType](BaseModel):
     def from_db_row(cls, row: dict[str, Any]) -> PinUnion:
         """Factory method to parse a database row into the appropriate Pin model subclass."""
         clean_row = {k: v for k, v in row.items() if v is not None}  # pyright: ignore[reportAny]
-        return PinAdapter.validate_python(clean_row)
+        hot = {k: clean_row.pop(k) for k in cls.hot_fields & clean_row.keys()}  # pyright: ignore[reportAny]
+        pin = PinAdapter.validate_python(clean_row)
+        if (last_message := hot.get("last_message")) is not None:
+            pin.last_message = int(last_message)  # pyright: ignore[reportAny]
+        if (msg_count := hot.get("msg_count")) is not None:
+            pin.msg_count = int(msg_count)  # pyright: ignore[reportAny]
+        if (last_message_dt := hot.get("last_message_dt")) is not None:
+            pin.state.last_message_ts = float(last_message_dt)  # pyright: ignore[reportAny]
+        return pin
+
+    def update_content(self, field: str, value: Any) -> None:
+        setattr(self, field, value)
+
+    def build_payload(self) -> dict[str, Any]:
+        """The JSON body of a create message request for this pin."""
+        raise NotImplementedError
+
+    def message_payload(self, allowed_mentions: discord.AllowedMentions | None = None) -> dict[str, Any]:
+        """Ready-to-send message body. Only rebuilt after one of the pin's content fields changes."""
+        if (payload := self.state.payload) is None:
+            payload = self.build_payload()
+            if allowed_mentions is not None:
+                payload["allowed_mentions"] = allowed_mentions.to_dict()
+            self.state.payload = payload
+        return payload
 
     async def send_to(self, _channel: discord.abc.Messageable) -> discord.Message:
         raise NotImplementedError
 
+    async def send_payload(self, channel: discord.abc.Messageable) -> int:
+        """
+        Send the cached payload straight to the create message route and return the new message's id.
+        Skips discord.py rebuilding the message parameters and a Message object on every repost.
+        This goes through discord.py internals (pinned in pyproject.toml), and falls back to `send_to` if they change.
+        """
+        if MultipartParameters is not None and (get_channel := getattr(channel, "_get_channel", None)) is not None:
+            target = await get_channel()  # pyright: ignore[reportAny]
+            state = getattr(target, "_state", None)  # pyright: ignore[reportAny]
+            if (send_message := getattr(getattr(state, "http", None), "send_message", None)) is not None:
+                params = MultipartParameters(self.message_payload(state.allowed_mentions), None, None)  # pyright: ignore[reportOptionalMemberAccess, reportAny]
+                data = await send_message(target.id, params=params)  # pyright: ignore[reportAny]
+                return int(data["id"])  # pyright: ignore[reportAny]
+        return (await self.send_to(channel)).id
+
 
 class TextPin(PinModel[Literal["text"]]):
     pin_type: Literal["text"] = "text"
     text: str = ""
 
+    content_fields: ClassVar[frozenset[str]] = frozenset({"text"})
+
     @override
     def to_db_tuple(self) -> tuple[Any, ...]:
         return (
             self.channel_id,
+            self.guild_id,
             self.pin_type,
             self.speed,
             self.speed_type.value,
             self.last_message,
+            self.state.last_message_ts,
+            self.msg_count,
             int(self.active),
             self.text,
             *(None, None, None, None),  # title, url, image, color
         )
 
+    @override
+    def build_payload(self) -> dict[str, Any]:
+        return {"content": self.text}
+
     @override
     async def send_to(self, channel: discord.abc.Messageable) -> discord.Message:
         return await channel.send(content=self.text)
@@ -82,6 +182,8 @@ class EmbedPin(PinModel[Literal["embed"]]):
 
     embed: Embed = Field(default_factory=lambda: Embed(), exclude=True)
 
+    content_fields: ClassVar[frozenset[str]] = frozenset({"title", "text", "url", "image", "color", "embed"})
+
     @model_validator(mode='after')
     def build_embed(self) -> Self:
         if not self.embed or not self.embed.description:
@@ -109,6 +211,30 @@ class EmbedPin(PinModel[Literal["embed"]]):
             _ = embed.set_image(url=self.image)
         self.embed = embed
 
+    @override
+    def update_content(self, field: str, value: Any) -> None:
+        """Set one content field and patch just that part of the embed, instead of rebuilding it."""
+        setattr(self, field, value)
+        match field:
+            case "title":
+                self.embed.title = value
+            case "text":
+                self.embed.description = value
+            case "url":
+                self.embed.url = value
+            case "color":
+                self.embed.colour = value
+            case "image":
+                _ = self.embed.set_image(url=value)
+            case _:
+                self.rebuild_embed()
+                return
+        self.state.payload = None
+
+    @override
+    def build_payload(self) -> dict[str, Any]:
+        return {"embeds": [self.embed.to_dict()]}
+
     def get_embed_info(self) -> dict[str, Any]:
         return dict(self.embed.to_dict())
 
@@ -116,10 +242,13 @@ class EmbedPin(PinModel[Literal["embed"]]):
     def to_db_tuple(self) -> tuple[Any, ...]:
         return (
             self.channel_id,
+            self.guild_id,
             self.pin_type,
             self.speed,
             self.speed_type.value,
             self.last_message,
+            self.state.last_message_ts,
+            self.msg_count,
             int(self.active),
             self.text,
             self.title,
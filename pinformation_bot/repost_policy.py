@@ -0,0 +1,33 @@
+"""
+When a pin is due for a repost. Shared by the pin cog and the offline simulator, so the simulator's numbers
+come from the same rules the bot runs on.
+"""
+
+from datetime import datetime, timedelta
+
+import discord
+
+from .pins import PinUnion
+
+
+def count_messages(pin: PinUnion, count: int) -> bool:
+    """Fold `count` new messages into a message-speed pin's counter and report whether a repost is due."""
+    state = pin.state
+    state.msg_count += count
+    return state.msg_count >= pin.speed
+
+
+def seconds_until_due(pin: PinUnion, now: datetime) -> float:
+    """Seconds from `now` until a time-speed pin is due, negative if it's overdue."""
+    last_dt = pin.last_message_dt
+    if last_dt is None and pin.last_message:
+        # message ids carry their creation time, so there's no need to fetch the old pin
+        last_dt = discord.utils.snowflake_time(pin.last_message)
+    if last_dt is None:
+        return 0.0
+    return (last_dt + timedelta(seconds=pin.speed) - now).total_seconds()
+
+
+def repost_delay(last_repost: float, min_interval: float, now: float) -> float:
+    """How long a due repost waits so reposts in a channel stay at least `min_interval` seconds apart."""
+    return max(last_repost + min_interval - now, 0.0)
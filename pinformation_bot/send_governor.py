@@ -0,0 +1,117 @@
+import logging
+from asyncio import sleep
+from collections.abc import Callable
+from enum import StrEnum
+from time import monotonic
+
+log = logging.getLogger(__name__)
+
+
+class OpKind(StrEnum):
+    send = "send"
+    delete = "delete"
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled continuously at `capacity` tokens every `per` seconds."""
+
+    __slots__: tuple[str, ...] = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: int, per: float, now: float) -> None:
+        self.capacity: float = float(capacity)
+        self.rate: float = capacity / per
+        self.tokens: float = float(capacity)
+        self.updated: float = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class SendGovernor:
+    """
+    Paces pin sends and deletes against Discord's rate limits before they reach discord.py.
+    Every operation needs a token from the global bucket and from its channel's bucket for that kind of
+    operation. When either is empty the caller waits here instead of tripping a 429.
+    A caller can pass `still_wanted`, which is checked again after every wait: a repost that was overtaken while it
+    waited is dropped rather than sent.
+    """
+
+    def __init__(
+        self,
+        global_limit: int = 50,
+        global_per: float = 1.0,
+        channel_sends: int = 5,
+        channel_send_per: float = 5.0,
+        channel_deletes: int = 5,
+        channel_delete_per: float = 1.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.throttled: int = 0
+        self.dropped: int = 0
+        self.clock: Callable[[], float] = clock  # the offline simulator swaps in virtual time
+        self._global: TokenBucket = TokenBucket(global_limit, global_per, clock())
+        self._limits: dict[OpKind, tuple[int, float]] = {
+            OpKind.send: (channel_sends, channel_send_per),
+            OpKind.delete: (channel_deletes, channel_delete_per),
+        }
+        self._buckets: dict[tuple[int, OpKind], TokenBucket] = {}
+
+    def _bucket(self, channel_id: int, kind: OpKind) -> TokenBucket:
+        if (bucket := self._buckets.get((channel_id, kind))) is None:
+            bucket = self._buckets[channel_id, kind] = TokenBucket(*self._limits[kind], self.clock())
+        return bucket
+
+    def delay(self, channel_id: int, kind: OpKind, now: float) -> float:
+        """Seconds from `now` until an operation fits in both the global and the channel's budget."""
+        return max(self._global.delay(now), self._bucket(channel_id, kind).delay(now))
+
+    def consume(self, channel_id: int, kind: OpKind, now: float) -> None:
+        self._global.consume(now)
+        self._bucket(channel_id, kind).consume(now)
+
+    async def acquire(self, channel_id: int, kind: OpKind, still_wanted: Callable[[], bool] | None = None) -> bool:
+        """
+        Wait until the operation fits in the global and channel budgets.
+        Returns False if `still_wanted` turned false while it waited, in which case no token is taken.
+        """
+        throttled = False
+        while True:
+            now = self.clock()
+            if (delay := self.delay(channel_id, kind, now)) <= 0:
+                break
+            if not throttled:
+                throttled = True
+                self.throttled += 1
+            await sleep(delay)
+            if still_wanted is not None and not still_wanted():
+                self.drop(channel_id)
+                return False
+
+        self.consume(channel_id, kind, now)
+        return True
+
+    async def acquire_send(self, channel_id: int, still_wanted: Callable[[], bool] | None = None) -> bool:
+        return await self.acquire(channel_id, OpKind.send, still_wanted)
+
+    async def acquire_delete(self, channel_id: int) -> None:
+        _ = await self.acquire(channel_id, OpKind.delete)
+
+    def drop(self, channel_id: int, count: int = 1) -> None:
+        """Count reposts that were dropped or folded into a newer one instead of being sent."""
+        self.dropped += count
+        log.debug(f"Dropped {count} superseded repost(s) in channel {channel_id}")
+
+    def forget(self, channel_id: int) -> None:
+        """Drop a channel's buckets once it no longer has a pin."""
+        for kind in OpKind:
+            _ = self._buckets.pop((channel_id, kind), None)
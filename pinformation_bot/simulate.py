@@ -0,0 +1,326 @@
+"""
+Offline traffic simulator and capacity planner for pin speed policies.
+
+Replays message traffic for a set of pinned channels in virtual time through the bot's own repost rules
+(repost_policy, as used by the pin cog and pin actors) and send pacing (SendGovernor), then reports what each
+pin speed costs: reposts, API calls, and how close channels get to Discord's rate limits. Nothing connects to Discord.
+
+Traffic is either synthetic, with a steady (Poisson) or bursty rate per channel, or replayed from a CSV file with
+`channel_id,timestamp` rows, where timestamps are unix seconds or ISO 8601.
+
+    uv run python -m pinformation_bot.simulate --channels 200 --rate 0.2 --speeds 1,5,10,25
+    uv run python -m pinformation_bot.simulate --csv traffic.csv --speed-type seconds --speeds 30,60,300
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import random
+from datetime import UTC, datetime, timedelta
+from enum import IntEnum
+from pathlib import Path
+from typing import Any
+
+from .pins import SpeedTypes, TextPin
+from .repost_policy import count_messages, repost_delay, seconds_until_due
+from .send_governor import OpKind, SendGovernor
+
+type Traffic = dict[int, list[float]]  # channel_id -> sorted message times, in seconds from the start
+
+SIM_EPOCH = datetime(2024, 1, 1, tzinfo=UTC)  # virtual wall clock for time based pins
+CHANNEL_SEND_WINDOW = 5.0  # Discord allows 5 sends per channel every 5 seconds
+GLOBAL_WINDOW = 1.0  # and 50 requests per second overall
+GOVERNOR_TICK = 0.001
+
+
+class Event(IntEnum):
+    # ordered so reposts due at the same moment as a message go out first, like the actor's trailing edge
+    repost = 0
+    deadline = 1
+    message = 2
+
+
+def poisson_traffic(channels: int, rate: float, duration: float, rng: random.Random) -> Traffic:
+    """`channels` channels with messages arriving independently at `rate` messages/s each."""
+    traffic: Traffic = {}
+    for channel_id in range(1, channels + 1):
+        times: list[float] = []
+        t = rng.expovariate(rate) if rate > 0 else duration
+        while t < duration:
+            times.append(t)
+            t += rng.expovariate(rate)
+        traffic[channel_id] = times
+    return traffic
+
+
+def bursty_traffic(
+    channels: int,
+    rate: float,
+    duration: float,
+    rng: random.Random,
+    burst_factor: float = 10.0,
+    burst_length: float = 30.0,
+    burst_every: float = 300.0,
+) -> Traffic:
+    """
+    Like poisson_traffic, but each channel alternates between quiet stretches and bursts `burst_factor` times busier,
+    lasting `burst_length` seconds on average and starting every `burst_every` seconds on average.
+    The average rate over time is still `rate`.
+    """
+    burst_share = min(burst_length / burst_every, 0.99)
+    quiet_rate = rate / (1 - burst_share + burst_factor * burst_share)
+    quiet_length = max(burst_every - burst_length, burst_every * 0.01)
+    traffic: Traffic = {}
+    for channel_id in range(1, channels + 1):
+        times: list[float] = []
+        t, bursting = 0.0, False
+        while t < duration:
+            period_end = min(t + rng.expovariate(1 / (burst_length if bursting else quiet_length)), duration)
+            period_rate = quiet_rate * burst_factor if bursting else quiet_rate
+            if period_rate > 0:
+                t += rng.expovariate(period_rate)
+                while t < period_end:
+                    times.append(t)
+                    t += rng.expovariate(period_rate)
+            t, bursting = period_end, not bursting
+        traffic[channel_id] = times
+    return traffic
+
+
+def _parse_timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        timestamp = datetime.fromisoformat(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=UTC)
+        return timestamp.timestamp()
+
+
+def csv_traffic(path: Path) -> tuple[Traffic, float]:
+    """Traffic from `channel_id,timestamp` rows (a header row is skipped), and the duration it covers."""
+    raw: dict[int, list[float]] = {}
+    with path.open(newline="", encoding="utf-8") as csv_file:
+        for row in csv.reader(csv_file):
+            if len(row) < 2 or not row[0].strip().isdigit():
+                continue
+            raw.setdefault(int(row[0]), []).append(_parse_timestamp(row[1].strip()))
+    if not raw:
+        raise ValueError(f"No channel_id,timestamp rows found in {path}")
+    first = min(min(times) for times in raw.values())
+    traffic = {channel_id: sorted(t - first for t in times) for channel_id, times in raw.items()}
+    return traffic, max(times[-1] for times in traffic.values()) + 1.0
+
+
+class _Channel:
+    __slots__ = ("armed", "last_repost", "messages", "pending", "pin", "requests", "reposts", "sends")
+
+    def __init__(self, pin: TextPin) -> None:
+        self.pin: TextPin = pin
+        self.last_repost: float = float("-inf")
+        self.pending: bool = False  # a repost is due and waiting out the minimum interval or the governor
+        self.armed: bool = False  # a time based pin's deadline is scheduled
+        self.messages: int = 0
+        self.reposts: int = 0
+        self.sends: list[float] = []
+        self.requests: list[float] = []
+
+
+def _peak(times: list[float], window: float) -> int:
+    """Most timestamps in any `window` seconds of the sorted `times`."""
+    peak = start = 0
+    for end, t in enumerate(times):
+        while times[start] <= t - window:
+            start += 1
+        peak = max(peak, end - start + 1)
+    return peak
+
+
+def simulate(
+    traffic: Traffic,
+    duration: float,
+    speed: int,
+    speed_type: SpeedTypes,
+    min_interval: float = 1.0,
+    latency: float = 0.08,
+) -> dict[str, Any]:
+    """
+    Run every channel's traffic through one pin per channel at `speed` and report what it cost.
+    A repost is a send of the new pin and a delete of the old one, each paced by the send governor. Deletes are
+    counted one per repost, an upper bound since the deletion service can fold several into one bulk delete.
+    """
+    if duration <= 0 or not traffic:
+        raise ValueError("Simulating needs at least one channel and a positive duration.")
+    governor = SendGovernor(clock=lambda: 0.0)  # virtual time starts at 0 and is passed in from there on
+    channels: dict[int, _Channel] = {}
+    events: list[tuple[float, int, int]] = []
+    for index, channel_id in enumerate(traffic):
+        pin = TextPin(channel_id=channel_id, guild_id=0, text="simulated", speed=speed, speed_type=speed_type)
+        # real pins were made at different times, so don't have every time based pin come due at the same moment
+        pin.last_message_dt = SIM_EPOCH - timedelta(seconds=speed * index / len(traffic))
+        channels[channel_id] = _Channel(pin)
+        events.extend((t, Event.message, channel_id) for t in traffic[channel_id] if t < duration)
+    heapq.heapify(events)
+
+    throttled = 0
+    max_wait = 0.0
+    due: dict[int, tuple[float, float]] = {}  # channel_id -> (when the repost became due, when it was scheduled for)
+
+    def schedule_repost(channel: _Channel, now: float) -> None:
+        channel.pending = True
+        scheduled = now + repost_delay(channel.last_repost, min_interval, now)
+        due[channel.pin.channel_id] = (now, scheduled)
+        heapq.heappush(events, (scheduled, Event.repost, channel.pin.channel_id))
+
+    while events:
+        now, event, channel_id = heapq.heappop(events)
+        if now >= duration:
+            break
+        channel = channels[channel_id]
+        pin = channel.pin
+        match event:
+            case Event.message:
+                channel.messages += 1
+                if channel.pending:
+                    continue  # lands before the repost that's already on its way, like a drained actor mailbox
+                if speed_type == SpeedTypes.messages:
+                    if count_messages(pin, 1):
+                        schedule_repost(channel, now)
+                elif not channel.armed:
+                    channel.armed = True
+                    deadline = now + max(seconds_until_due(pin, SIM_EPOCH + timedelta(seconds=now)), 0.0)
+                    heapq.heappush(events, (deadline, Event.deadline, channel_id))
+            case Event.deadline:
+                channel.armed = False
+                schedule_repost(channel, now)
+            case Event.repost:
+                if (wait := governor.delay(channel_id, OpKind.send, now)) > 0:
+                    # a floor on the wait so float rounding can't leave the bucket a hair short forever
+                    heapq.heappush(events, (now + max(wait, GOVERNOR_TICK), Event.repost, channel_id))
+                    continue
+                due_at, scheduled = due.pop(channel_id)
+                if now > scheduled:
+                    throttled += 1
+                max_wait = max(max_wait, now - due_at)
+                governor.consume(channel_id, OpKind.send, now)
+                governor.consume(channel_id, OpKind.delete, now)
+                channel.sends.append(now)
+                channel.requests.extend((now, now))
+                pin.state.msg_count = 0
+                pin.last_message_dt = SIM_EPOCH + timedelta(seconds=now)
+                channel.pending = False
+                channel.last_repost = now + latency
+                channel.reposts += 1
+
+    # reposts still waiting when the traffic ends are the backlog the governor couldn't clear
+    max_wait = max([max_wait, *(duration - due_at for due_at, _ in due.values())])
+    hours = duration / 3600
+    reposts = sum(channel.reposts for channel in channels.values())
+    messages = sum(channel.messages for channel in channels.values())
+    all_requests = sorted(t for channel in channels.values() for t in channel.requests)
+    busiest = max(channels.values(), key=lambda channel: _peak(channel.sends, CHANNEL_SEND_WINDOW))
+    return {
+        "speed": speed,
+        "speed_type": str(speed_type),
+        "channels": len(channels),
+        "hours": round(hours, 3),
+        "messages": messages,
+        "reposts": reposts,
+        "reposts_per_hour": round(reposts / hours, 1),
+        "api_calls": len(all_requests),
+        "api_calls_per_hour": round(len(all_requests) / hours, 1),
+        "messages_per_repost": round(messages / reposts, 2) if reposts else None,
+        "peak_channel_sends_per_5s": _peak(busiest.sends, CHANNEL_SEND_WINDOW),
+        "busiest_channel": busiest.pin.channel_id,
+        "peak_requests_per_s": _peak(all_requests, GLOBAL_WINDOW),
+        "throttled_reposts": throttled,
+        "backlog": len(due),
+        "max_repost_wait_s": round(max_wait, 2),
+    }
+
+
+def _print_table(results: list[dict[str, Any]]) -> None:
+    columns = (
+        ("speed", "speed"),
+        ("reposts/h", "reposts_per_hour"),
+        ("API calls/h", "api_calls_per_hour"),
+        ("msgs/repost", "messages_per_repost"),
+        ("peak sends/5s/ch", "peak_channel_sends_per_5s"),
+        ("peak req/s", "peak_requests_per_s"),
+        ("throttled", "throttled_reposts"),
+        ("backlog", "backlog"),
+        ("max wait s", "max_repost_wait_s"),
+    )
+    rows = [[title for title, _ in columns]] + [[str(result[key]) for _, key in columns] for result in results]
+    widths = [max(len(row[index]) for row in rows) for index in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths, strict=True)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--speeds", default="1,5,10,25", help="comma separated pin speeds to compare")
+    _ = parser.add_argument("--speed-type", choices=[str(s) for s in SpeedTypes], default=str(SpeedTypes.messages))
+    _ = parser.add_argument("--profile", choices=("poisson", "bursty"), default="poisson")
+    _ = parser.add_argument("--csv", type=Path, help="replay channel_id,timestamp rows instead of synthetic traffic")
+    _ = parser.add_argument("--channels", type=int, default=200)
+    _ = parser.add_argument("--rate", type=float, default=0.1, help="average messages per second per channel")
+    _ = parser.add_argument("--duration", type=float, default=3600, help="seconds of synthetic traffic")
+    _ = parser.add_argument("--burst-factor", type=float, default=10.0, help="how much busier bursts are")
+    _ = parser.add_argument("--burst-length", type=float, default=30.0, help="average burst length in seconds")
+    _ = parser.add_argument("--burst-every", type=float, default=300.0, help="average seconds between bursts")
+    _ = parser.add_argument("--min-repost-interval", type=float, default=1.0)
+    _ = parser.add_argument("--latency-ms", type=float, default=80, help="time a repost's API calls take")
+    _ = parser.add_argument("--seed", type=int, default=0)
+    _ = parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args()
+
+    try:
+        speeds = [int(speed) for speed in args.speeds.split(",")]
+    except ValueError:
+        parser.error(f"--speeds must be comma separated whole numbers, got {args.speeds!r}")
+    if min(speeds) < 1:
+        parser.error("--speeds must all be at least 1")
+    if args.csv is None and args.channels < 1:
+        parser.error("--channels must be at least 1")
+    if args.csv is None and args.duration <= 0:
+        parser.error("--duration must be positive")
+    if args.rate < 0 or args.min_repost_interval < 0 or args.latency_ms < 0:
+        parser.error("--rate, --min-repost-interval and --latency-ms can't be negative")
+    if args.profile == "bursty" and not (args.burst_factor > 0 and 0 < args.burst_length < args.burst_every):
+        parser.error("bursty traffic needs --burst-factor > 0 and 0 < --burst-length < --burst-every")
+
+    if args.csv is not None:
+        try:
+            traffic, duration = csv_traffic(args.csv)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        rng = random.Random(args.seed)  # noqa: S311
+        duration = args.duration
+        if args.profile == "bursty":
+            traffic = bursty_traffic(
+                args.channels, args.rate, duration, rng, args.burst_factor, args.burst_length, args.burst_every
+            )
+        else:
+            traffic = poisson_traffic(args.channels, args.rate, duration, rng)
+
+    results = [
+        simulate(
+            traffic,
+            duration,
+            speed,
+            SpeedTypes(args.speed_type),
+            min_interval=args.min_repost_interval,
+            latency=args.latency_ms / 1000,
+        )
+        for speed in speeds
+    ]
+    _print_table(results)
+    if args.json is not None:
+        _ = args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
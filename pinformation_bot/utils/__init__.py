@@ -1,2 +1,2 @@
 from .channel_lock import ChannelLock
-from .utils import check_permitted, delete_old_message, handle_reply
+from .utils import check_permitted, handle_reply
@@ -1,30 +1,176 @@
-from asyncio import Lock
+from asyncio import Lock, timeout
+from collections import OrderedDict
+from time import perf_counter
 from types import TracebackType
+from typing import ClassVar
+
+
+class LockStats:
+    """Per-channel lock diagnostics. Times are in seconds."""
+
+    __slots__ = ("acquisitions", "contended", "hold_max", "hold_total", "timeouts", "wait_max", "wait_total")
+
+    def __init__(self) -> None:
+        self.acquisitions: int = 0
+        self.contended: int = 0  # acquisitions that found the lock already held
+        self.timeouts: int = 0  # try_acquire calls that gave up
+        self.wait_total: float = 0.0
+        self.wait_max: float = 0.0
+        self.hold_total: float = 0.0
+        self.hold_max: float = 0.0
+
+
+class _Entry:
+    __slots__ = ("discarded", "held_since", "lock", "refs", "stats")
+
+    def __init__(self) -> None:
+        self.lock: Lock = Lock()
+        self.refs: int = 0  # holders plus waiters. Entries are only evicted at 0
+        self.held_since: float = 0.0
+        self.discarded: bool = False  # drop as soon as it's idle instead of keeping it around
+        self.stats: LockStats = LockStats()
+
+
+class ChannelLockManager:
+    """
+    Channel locks, created on first use. A lock counts as idle once nobody holds or waits on it, and only the
+    `max_idle` most recently used idle locks are kept, so channels that were locked once don't pin a Lock forever.
+    An evicted channel just gets a fresh lock (and fresh stats) next time.
+    """
+
+    def __init__(self, max_idle: int = 1024) -> None:
+        self.max_idle: int = max_idle
+        self.contended: int = 0
+        self.timeouts: int = 0
+        self.evicted: int = 0
+        self._entries: dict[int, _Entry] = {}
+        self._idle: OrderedDict[int, None] = OrderedDict()  # idle channel ids, least recently used first
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _checkout(self, channel_id: int) -> _Entry:
+        if (entry := self._entries.get(channel_id)) is None:
+            entry = self._entries[channel_id] = _Entry()
+        elif entry.refs == 0:
+            del self._idle[channel_id]
+        entry.refs += 1
+        return entry
+
+    def _checkin(self, channel_id: int, entry: _Entry) -> None:
+        entry.refs -= 1
+        if entry.refs or self._entries.get(channel_id) is not entry:
+            return
+        if entry.discarded:
+            del self._entries[channel_id]
+            return
+        self._idle[channel_id] = None
+        while len(self._idle) > self.max_idle:
+            evicted_id, _ = self._idle.popitem(last=False)
+            del self._entries[evicted_id]
+            self.evicted += 1
+
+    def _record_wait(self, entry: _Entry, waited: float) -> None:
+        entry.held_since = perf_counter()
+        stats = entry.stats
+        stats.acquisitions += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+
+    async def acquire(self, channel_id: int) -> None:
+        entry = self._checkout(channel_id)
+        if entry.lock.locked():
+            entry.stats.contended += 1
+            self.contended += 1
+        started = perf_counter()
+        try:
+            _ = await entry.lock.acquire()
+        except BaseException:
+            self._checkin(channel_id, entry)
+            raise
+        self._record_wait(entry, perf_counter() - started)
+
+    async def try_acquire(self, channel_id: int, wait: float = 0.0) -> bool:
+        """
+        Acquire the channel's lock if it's free within `wait` seconds, which can be 0 to not wait at all.
+        Returns whether it was acquired. If it was, `release` it when done.
+        """
+        entry = self._checkout(channel_id)
+        if entry.lock.locked():
+            entry.stats.contended += 1
+            self.contended += 1
+        started = perf_counter()
+        try:
+            async with timeout(max(wait, 0.0)):
+                _ = await entry.lock.acquire()
+        except TimeoutError:
+            entry.stats.timeouts += 1
+            self.timeouts += 1
+            self._checkin(channel_id, entry)
+            return False
+        except BaseException:
+            self._checkin(channel_id, entry)
+            raise
+        self._record_wait(entry, perf_counter() - started)
+        return True
+
+    def release(self, channel_id: int) -> None:
+        entry = self._entries[channel_id]
+        held = perf_counter() - entry.held_since
+        entry.stats.hold_total += held
+        entry.stats.hold_max = max(entry.stats.hold_max, held)
+        entry.lock.release()
+        self._checkin(channel_id, entry)
+
+    def is_locked(self, channel_id: int) -> bool:
+        return (entry := self._entries.get(channel_id)) is not None and entry.lock.locked()
+
+    def discard(self, channel_id: int) -> None:
+        """Forget a channel's lock and stats, once nobody holds or waits on the lock."""
+        if (entry := self._entries.get(channel_id)) is None:
+            return
+        if entry.refs:
+            entry.discarded = True
+            return
+        del self._entries[channel_id]
+        del self._idle[channel_id]
+
+    def stats(self, channel_id: int) -> LockStats | None:
+        return entry.stats if (entry := self._entries.get(channel_id)) is not None else None
+
+    def most_contended(self, count: int = 5) -> list[tuple[int, LockStats]]:
+        """The channels whose callers spent the longest waiting for their lock, longest first."""
+        ranked = sorted(self._entries.items(), key=lambda item: item[1].stats.wait_total, reverse=True)
+        return [(channel_id, entry.stats) for channel_id, entry in ranked[:count] if entry.stats.contended]
 
 
 class ChannelLock:
     """
-    An independent context manager for channel-level locks. Maintains its own registry of locks keyed by channel_id.
+    An independent context manager for channel-level locks, backed by a shared ChannelLockManager.
     """
 
-    _locks: dict[int, Lock] = {}
+    manager: ClassVar[ChannelLockManager] = ChannelLockManager()
 
     def __init__(self, channel_id: int):
         self.channel_id: int = channel_id
-        self.lock: Lock | None = None
 
     async def __aenter__(self):
-        if self.channel_id not in ChannelLock._locks:
-            ChannelLock._locks[self.channel_id] = Lock()
-        self.lock = ChannelLock._locks[self.channel_id]
-        await self.lock.__aenter__()
+        await ChannelLock.manager.acquire(self.channel_id)
         return self
 
     async def __aexit__(
         self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: TracebackType | None
     ):
-        if self.lock:
-            await self.lock.__aexit__(exc_type, exc_val, exc_tb)
+        ChannelLock.manager.release(self.channel_id)
+
+    @classmethod
+    async def try_acquire(cls, channel_id: int, wait: float = 0.0) -> bool:
+        """See ChannelLockManager.try_acquire. Pair a successful call with `ChannelLock.release`."""
+        return await cls.manager.try_acquire(channel_id, wait)
+
+    @classmethod
+    def release(cls, channel_id: int) -> None:
+        cls.manager.release(channel_id)
 
     @classmethod
     def cleanup(cls, channel_id: int) -> None:
@@ -32,9 +178,9 @@ class ChannelLock:
         Remove a channel's lock from the registry.
         Call this when a pin is removed from a channel.
         """
-        _ = cls._locks.pop(channel_id, None)
+        cls.manager.discard(channel_id)
 
     @classmethod
     def is_locked(cls, channel_id: int) -> bool:
         """Check if a channel's lock is currently held."""
-        return channel_id in cls._locks and cls._locks[channel_id].locked()
+        return cls.manager.is_locked(channel_id)
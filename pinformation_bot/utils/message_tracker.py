@@ -0,0 +1,44 @@
+from collections import deque
+from collections.abc import Iterable
+
+import discord
+
+
+class LatestMessageTracker:
+    """
+    Remembers the newest message ids of each pinned channel, fed by gateway create and delete events.
+    A few recent ids are kept per channel so that deleting the newest message falls back to the one before it.
+    """
+
+    def __init__(self, depth: int = 8) -> None:
+        self.depth: int = depth
+        self._recent: dict[int, deque[int]] = {}
+
+    def seen(self, channel_id: int, message_id: int) -> None:
+        if (recent := self._recent.get(channel_id)) is None:
+            recent = self._recent[channel_id] = deque(maxlen=self.depth)
+        # the bot records its own sends before the gateway echoes them back, so ignore anything older
+        if not recent or message_id > recent[-1]:
+            recent.append(message_id)
+
+    def deleted(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        if not (recent := self._recent.get(channel_id)):
+            return
+        gone = set(message_ids)
+        kept = [message_id for message_id in recent if message_id not in gone]
+        if len(kept) != len(recent):
+            recent.clear()
+            recent.extend(kept)
+
+    def latest(self, channel: discord.abc.Messageable) -> int | None:
+        """
+        The newest message id in `channel`, or None if it isn't known.
+        Channels with no events yet fall back to discord.py's `last_message_id`.
+        """
+        channel_id: int = channel.id  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        if (recent := self._recent.get(channel_id)) is None:
+            return getattr(channel, "last_message_id", None)
+        return recent[-1] if recent else None
+
+    def forget(self, channel_id: int) -> None:
+        _ = self._recent.pop(channel_id, None)
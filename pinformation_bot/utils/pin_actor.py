@@ -0,0 +1,127 @@
+import logging
+from asyncio import Queue, QueueEmpty, Task, create_task, sleep
+from collections.abc import Awaitable, Callable
+from time import monotonic
+
+import discord
+
+from ..repost_policy import repost_delay
+
+log = logging.getLogger(__name__)
+
+type CounterHandler = Callable[[discord.abc.Messageable, int], bool]
+type RepostHandler = Callable[[discord.abc.Messageable], Awaitable[None]]
+
+
+class PinActor:
+    """
+    A long-lived task that owns the hot state of one channel's pin.
+    Messages are dropped into the mailbox without waiting on anything, and counted without waiting either.
+    Reposts run in a second task the actor owns, so a send held up by the governor or the channel lock doesn't
+    stop the channel's messages from being counted. A burst of messages is folded into a single trailing-edge
+    repost, and reposts are spaced at least `min_interval` seconds apart. Time-based pins are reposted when the
+    scheduler posts a deadline instead.
+    """
+
+    def __init__(
+        self, channel_id: int, on_messages: CounterHandler, repost: RepostHandler, min_interval: float = 1.0
+    ) -> None:
+        self.channel_id: int = channel_id
+        self.min_interval: float = min_interval
+        self.mailbox: Queue[discord.abc.Messageable] = Queue()
+        self.last_repost: float = 0.0
+        self._deadlines: int = 0
+        self._due: bool = False  # a repost is owed that the reposter hasn't started yet
+        self._reposter: Task[None] | None = None
+        self._on_messages: CounterHandler = on_messages
+        self._repost: RepostHandler = repost
+        self._task: Task[None] = create_task(self._run(), name=f"pin-actor-{channel_id}")
+
+    def post(self, channel: discord.abc.Messageable) -> None:
+        self.mailbox.put_nowait(channel)
+
+    def post_deadline(self, channel: discord.abc.Messageable) -> None:
+        self._deadlines += 1
+        self.mailbox.put_nowait(channel)
+
+    def stop(self) -> None:
+        _ = self._task.cancel()
+        if self._reposter is not None:
+            _ = self._reposter.cancel()
+
+    def _drain(self, drained: int = 0) -> tuple[int, bool]:
+        """Empty the mailbox, returning the number of messages in it and whether a deadline was posted."""
+        while True:
+            try:
+                _ = self.mailbox.get_nowait()
+            except QueueEmpty:
+                break
+            drained += 1
+        deadlines, self._deadlines = self._deadlines, 0
+        return drained - deadlines, deadlines > 0
+
+    async def _run(self) -> None:
+        while True:
+            channel = await self.mailbox.get()
+            try:
+                count, deadline = self._drain(drained=1)
+                if not (self._on_messages(channel, count) or deadline):
+                    continue
+                self._due = True
+                if self._reposter is None:
+                    self._reposter = create_task(self._repost_while_due(channel), name=f"pin-repost-{self.channel_id}")
+            except Exception:
+                log.exception(f"Pin actor for channel {self.channel_id} failed to handle messages:")
+
+    async def _repost_while_due(self, channel: discord.abc.Messageable) -> None:
+        try:
+            while self._due:
+                # trailing edge: let the rest of the burst land before reposting
+                if (wait := repost_delay(self.last_repost, self.min_interval, monotonic())) > 0:
+                    await sleep(wait)
+                self._due = False
+                try:
+                    await self._repost(channel)
+                except Exception:
+                    log.exception(f"Pin actor for channel {self.channel_id} failed to repost:")
+                self.last_repost = monotonic()
+        finally:
+            self._reposter = None
+
+
+class PinActors:
+    """Registry of per-channel pin actors, created lazily on the first message in a pinned channel."""
+
+    def __init__(self, on_messages: CounterHandler, repost: RepostHandler, min_interval: float = 1.0) -> None:
+        self.min_interval: float = min_interval
+        self._actors: dict[int, PinActor] = {}
+        self._on_messages: CounterHandler = on_messages
+        self._repost: RepostHandler = repost
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    @property
+    def backlog(self) -> int:
+        """Messages and deadlines posted to actors that they haven't picked up yet."""
+        return sum(actor.mailbox.qsize() for actor in self._actors.values())
+
+    def post(self, channel: discord.abc.Messageable) -> None:
+        channel_id: int = channel.id  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        if (actor := self._actors.get(channel_id)) is None:
+            actor = PinActor(channel_id, self._on_messages, self._repost, self.min_interval)
+            self._actors[channel_id] = actor
+        actor.post(channel)
+
+    def post_deadline(self, channel: discord.abc.Messageable) -> None:
+        if actor := self._actors.get(channel.id):  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownArgumentType]
+            actor.post_deadline(channel)
+
+    def stop(self, channel_id: int) -> None:
+        if actor := self._actors.pop(channel_id, None):
+            actor.stop()
+
+    def stop_all(self) -> None:
+        for actor in self._actors.values():
+            actor.stop()
+        self._actors.clear()
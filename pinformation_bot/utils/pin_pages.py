@@ -0,0 +1,67 @@
+from contextlib import suppress
+from typing import override
+
+import discord
+
+from ..pins import PinUnion
+
+PINS_PER_PAGE = 10  # Discord allows 25 fields per embed, 10 keeps a page readable
+
+
+def pin_list_pages(pins: list[PinUnion], title: str, color: int) -> list[discord.Embed]:
+    """Split `pins` into embeds of PINS_PER_PAGE fields each, numbered in the footer when there's more than one."""
+    chunks = [pins[start : start + PINS_PER_PAGE] for start in range(0, len(pins), PINS_PER_PAGE)]
+    pages: list[discord.Embed] = []
+    for page_number, chunk in enumerate(chunks, start=1):
+        embed = discord.Embed(title=title, type="rich", color=color)
+        for pin in chunk:
+            # mention by id so listing doesn't depend on the channel being cached
+            _ = embed.add_field(name=f"<#{pin.channel_id}>", value=pin.get_self_data(), inline=False)
+        if len(chunks) > 1:
+            _ = embed.set_footer(text=f"Page {page_number}/{len(chunks)} · {len(pins)} pins")
+        pages.append(embed)
+    return pages
+
+
+class EmbedPages(discord.ui.View):
+    """Previous/next buttons flipping through `pages`, usable only by the member who asked for them."""
+
+    def __init__(self, pages: list[discord.Embed], author_id: int, timeout: float = 180.0) -> None:
+        super().__init__(timeout=timeout)
+        self.pages: list[discord.Embed] = pages
+        self.author_id: int = author_id
+        self.index: int = 0
+        self.message: discord.Message | None = None
+        self._update_buttons()
+
+    def _update_buttons(self) -> None:
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index == len(self.pages) - 1
+
+    @override
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            _ = await interaction.response.send_message("These pages belong to someone else.", ephemeral=True)
+            return False
+        return True
+
+    @override
+    async def on_timeout(self) -> None:
+        if self.message is None:
+            return
+        # the message may be gone or its interaction token expired, either way there's nothing left to clean up
+        with suppress(discord.HTTPException):
+            _ = await self.message.edit(view=None)
+
+    async def _show(self, interaction: discord.Interaction, index: int) -> None:
+        self.index = index
+        self._update_buttons()
+        _ = await interaction.response.edit_message(embed=self.pages[index], view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, _button: discord.ui.Button[EmbedPages]) -> None:
+        await self._show(interaction, max(self.index - 1, 0))
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, _button: discord.ui.Button[EmbedPages]) -> None:
+        await self._show(interaction, min(self.index + 1, len(self.pages) - 1))
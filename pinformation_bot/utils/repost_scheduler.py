@@ -0,0 +1,77 @@
+import logging
+from asyncio import Event, Task, create_task, get_running_loop, timeout
+from collections.abc import Callable
+from contextlib import suppress
+from heapq import heappop, heappush
+
+log = logging.getLogger(__name__)
+
+
+class RepostScheduler:
+    """
+    A single timer task holding the next repost deadline of every armed time-based pin.
+    Deadlines are kept in a heap keyed on the event loop clock, so arming, disarming and firing a
+    channel are all O(log n). Disarmed entries are left in the heap and skipped when they surface.
+    """
+
+    def __init__(self, fire: Callable[[int], None]) -> None:
+        self._fire: Callable[[int], None] = fire
+        self._heap: list[tuple[float, int]] = []  # (deadline, channel_id)
+        self._deadlines: dict[int, float] = {}  # channel_id -> live deadline
+        self._wakeup: Event = Event()
+        self._task: Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = create_task(self._run(), name="pin-repost-scheduler")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            self._task = None
+
+    def is_armed(self, channel_id: int) -> bool:
+        return channel_id in self._deadlines
+
+    def arm(self, channel_id: int, delay: float) -> None:
+        """Fire `channel_id` in `delay` seconds. A channel that is already armed keeps its current deadline."""
+        if channel_id in self._deadlines:
+            return
+        deadline = get_running_loop().time() + max(delay, 0.0)
+        self._deadlines[channel_id] = deadline
+        heappush(self._heap, (deadline, channel_id))
+        if self._heap[0] == (deadline, channel_id):
+            self._wakeup.set()
+
+    def disarm(self, channel_id: int) -> None:
+        _ = self._deadlines.pop(channel_id, None)
+
+    def _discard_stale(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            _ = heappop(self._heap)
+
+    async def _run(self) -> None:
+        loop = get_running_loop()
+        while True:
+            self._wakeup.clear()
+            self._discard_stale()
+            if not self._heap:
+                _ = await self._wakeup.wait()
+                continue
+
+            deadline, channel_id = self._heap[0]
+            if (delay := deadline - loop.time()) > 0:
+                with suppress(TimeoutError):
+                    async with timeout(delay):
+                        _ = await self._wakeup.wait()
+                continue
+
+            _ = heappop(self._heap)
+            del self._deadlines[channel_id]
+            try:
+                self._fire(channel_id)
+            except Exception:
+                log.exception(f"Failed to fire repost deadline for channel {channel_id}:")
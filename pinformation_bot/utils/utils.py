@@ -1,4 +1,5 @@
 import logging
+from collections.abc import Iterable
 
 import discord
 from discord.ext import commands
@@ -22,26 +23,6 @@ async def handle_reply(ctx: commands.Context[PinformationBot], msg: str, success
     _ = await ctx.reply(msg, ephemeral=reply)
 
 
-async def delete_old_message(channel: discord.abc.Messageable, message_id: int | None):
-    if not message_id:
-        return
-
-    try:
-        # use bulk delete endpoint for TextChannel/VoiceChannel/Thread
-        if isinstance(channel, (discord.TextChannel, discord.VoiceChannel, discord.Thread)):
-            await channel.delete_messages([discord.Object(id=message_id)])
-        else:  # fallback for Direct Messages or raw Messageable objects
-            msg = await channel.fetch_message(message_id)
-            await msg.delete()
-
-    except discord.NotFound:
-        channel_name = getattr(channel, "name", f"Channel {getattr(channel, 'id', 'unknown')}")
-        log.warning(f"Failed to find & delete last message in {channel_name}")
-    except discord.HTTPException as e:
-        channel_name = getattr(channel, "name", f"Channel {getattr(channel, 'id', 'unknown')}")
-        log.warning(f"Failed to delete last message in {channel_name} with HTTP exception: {e}")
-
-
 async def get_pin(ctx: commands.Context[PinformationBot], bot: PinformationBot, channel_id: int) -> PinUnion | None:
     if pin := bot.pins.get(channel_id):
         return pin
@@ -49,11 +30,18 @@ async def get_pin(ctx: commands.Context[PinformationBot], bot: PinformationBot,
     return None
 
 
+def _role_ids(ctx: commands.Context[PinformationBot]) -> Iterable[int]:
+    # Users in DMs or outside the member cache have no roles here
+    if not isinstance(ctx.author, discord.Member):
+        return ()
+    # Member.roles resolves and sorts Role objects, the raw ids are all the checks need. _roles is private, so fall
+    # back to the public attribute if a discord.py update renames it
+    role_ids: Iterable[int] | None = getattr(ctx.author, "_roles", None)
+    return role_ids if role_ids is not None else [role.id for role in ctx.author.roles]
+
+
 async def _check_admin(ctx: commands.Context[PinformationBot]) -> bool:
-    if (str(ctx.author.id)) in ctx.bot.config.admin_users:
-        return True
-    user_role_ids = [str(role.id) for role in ctx.author.roles]  # pyright: ignore[reportUnknownMemberType, reportAttributeAccessIssue, reportUnknownArgumentType, reportUnknownVariableType]
-    return bool(any(admin_role in user_role_ids for admin_role in ctx.bot.config.admin_roles))
+    return ctx.bot.permissions.is_admin(ctx.author.id, _role_ids(ctx))
 
 
 async def check_admin(ctx: commands.Context[PinformationBot]) -> bool:
@@ -71,16 +59,9 @@ async def check_permitted(ctx: commands.Context[PinformationBot]) -> bool:
     If false, the user is given an ephemeral message that they don't have permission
     and logs that the user tried to use a role outside their permissions.
     """
-    if await _check_admin(ctx):
+    if ctx.bot.permissions.is_permitted(ctx.author.id, _role_ids(ctx), ctx.channel.id):
         return True
 
-    user_role_ids = [str(role.id) for role in ctx.author.roles]  # pyright: ignore[reportUnknownMemberType, reportAttributeAccessIssue, reportUnknownArgumentType, reportUnknownVariableType]
-    permitted_roles = ctx.bot.config.permitted_roles
-
-    for role_id in user_role_ids:
-        if role_id in permitted_roles and str(ctx.channel.id) in permitted_roles[role_id]:
-            return True
-
     _ = await ctx.reply("You are not authorized to use this command!", ephemeral=True)
     log.warning(f"{ctx.author.name}({ctx.author.id}): attempted to use the {ctx.command} command.")
     return False